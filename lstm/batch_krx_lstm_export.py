@@ -1,10 +1,18 @@
 import argparse
+import atexit
 import csv
+import hashlib
 import io
 import json
+import multiprocessing
 import os
+import pickle
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, time as dt_time, timedelta, timezone
 from pathlib import Path
+from time import perf_counter
 
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
 
@@ -59,10 +67,26 @@ def ensure_dependencies():
     brier_score_loss = _brier_score_loss
 
 
+def ensure_numpy():
+    global np
+
+    if np is None:
+        import numpy as _np
+
+        np = _np
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Train per-stock LSTM models on KRX daily CSV files and export predictions."
     )
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["train", "predict"],
+        default="train",
+        help="train fits models and exports predictions; predict reuses saved model artifacts without training.",
+    )
     parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT)
     parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
     parser.add_argument("--news-file", type=Path, default=DEFAULT_NEWS_FILE)
@@ -90,6 +114,55 @@ def parse_args():
     parser.add_argument("--tuning-output", type=Path, default=None)
     parser.add_argument("--backtest-output", type=Path, default=None)
     parser.add_argument("--data-audit-output", type=Path, default=None)
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Directory for parsed KRX caches. Defaults to <output dir>/cache.",
+    )
+    parser.add_argument(
+        "--exclude-feature-groups",
+        nargs="+",
+        default=[],
+        choices=[group for group in FEATURE_GROUPS if group != "price"],
+        help="Feature groups to leave out of the model inputs, e.g. --exclude-feature-groups market_news stock_news",
+    )
+    parser.add_argument(
+        "--model-mode",
+        choices=["per_stock", "pooled"],
+        default="per_stock",
+        help="Train one model per stock, or one shared model across all stocks with a symbol embedding.",
+    )
+    parser.add_argument(
+        "--pooled-batch-size",
+        type=int,
+        default=512,
+        help="Batch size for the pooled model's streamed training windows and batched inference.",
+    )
+    parser.add_argument(
+        "--warm-start-epochs",
+        type=int,
+        default=3,
+        help="Epochs used to fine-tune a stock from its previous run's weights. 0 always retrains from scratch.",
+    )
+    parser.add_argument(
+        "--stack-size",
+        type=int,
+        default=1,
+        help="Per-stock models trained together in one stacked graph. 1 fits each stock separately.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to train per-stock models. 1 trains in-process; 0 sizes the pool from CPU count and available memory.",
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=0,
+        help="Processes used to load KRX CSV files. 0 picks min(8, CPU count).",
+    )
     return parser.parse_args()
 
 
@@ -137,52 +210,216 @@ def pct_change(current, previous):
     return (current / previous - 1.0) * 100.0
 
 
+def rolling_sum(values, window):
+    cumulative = np.cumsum(values, axis=-1, dtype=np.float64)
+    trailing = np.zeros_like(cumulative)
+    trailing[..., window:] = cumulative[..., :-window]
+    return cumulative - trailing
+
+
+def rolling_counts(length, window):
+    return np.minimum(np.arange(1, length + 1, dtype=np.float64), window)
+
+
 def rolling_mean(values, window):
-    out = np.zeros_like(values, dtype=np.float32)
-    for idx in range(len(values)):
-        start = max(0, idx - window + 1)
-        out[idx] = np.mean(values[start : idx + 1])
-    return out
+    values = np.asarray(values)
+    counts = rolling_counts(values.shape[-1], window)
+    return (rolling_sum(values, window) / counts).astype(np.float32)
 
 
 def rolling_std(values, window):
-    out = np.zeros_like(values, dtype=np.float32)
-    for idx in range(len(values)):
-        start = max(0, idx - window + 1)
-        out[idx] = np.std(values[start : idx + 1])
-    return out
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[-1] == 0:
+        return np.zeros(values.shape, dtype=np.float32)
+    centered = values - values.mean(axis=-1, keepdims=True)
+    counts = rolling_counts(values.shape[-1], window)
+    mean = rolling_sum(centered, window) / counts
+    variance = rolling_sum(centered * centered, window) / counts - mean * mean
+    return np.sqrt(np.maximum(variance, 0.0)).astype(np.float32)
+
+
+def rolling_extreme(values, window, reducer):
+    values = np.asarray(values)
+    if values.shape[-1] == 0:
+        return np.zeros(values.shape, dtype=np.float32)
+    leading = np.repeat(values[..., :1], window - 1, axis=-1)
+    padded = np.concatenate([leading, values], axis=-1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=-1)
+    return reducer(windows, axis=-1).astype(np.float32)
 
 
 def rolling_max(values, window):
-    out = np.zeros_like(values, dtype=np.float32)
-    for idx in range(len(values)):
-        start = max(0, idx - window + 1)
-        out[idx] = np.max(values[start : idx + 1])
-    return out
+    return rolling_extreme(values, window, np.max)
 
 
 def rolling_min(values, window):
-    out = np.zeros_like(values, dtype=np.float32)
-    for idx in range(len(values)):
-        start = max(0, idx - window + 1)
-        out[idx] = np.min(values[start : idx + 1])
-    return out
+    return rolling_extreme(values, window, np.min)
+
 
+KRX_CACHE_VERSION = 1
+KRX_NUMERIC_FIELDS = (
+    "TDD_CLSPRC",
+    "TDD_HGPRC",
+    "TDD_LWPRC",
+    "TDD_OPNPRC",
+    "ACC_TRDVAL",
+    "ACC_TRDVOL",
+    "MKTCAP",
+)
+KRX_IDENTITY_FIELDS = ("MKT_NM", "ISU_CD", "ISU_NM")
 
-def read_krx_rows(path):
+
+def parse_float_column(values):
+    cells = "\x1f".join(values).replace(",", "").split("\x1f") if values else []
+    try:
+        return np.fromiter(map(float, cells), dtype=np.float64, count=len(cells))
+    except ValueError:
+        return np.fromiter(map(parse_float, values), dtype=np.float64, count=len(values))
+
+
+def read_krx_series(path):
     raw = path.read_bytes().replace(b"\x00", b"")
     text = raw.decode("utf-8-sig", errors="ignore")
-    reader = csv.DictReader(io.StringIO(text))
-    rows = []
-    for row in reader:
-        cleaned = {key: clean_cell(value) for key, value in row.items()}
-        if not clean_cell(cleaned.get("BAS_DD", "")):
+    records = csv.reader(io.StringIO(text))
+    header = next(records, [])
+    body = [record for record in records if record]
+    width = len(header)
+    if set(map(len, body)) - {width}:
+        body = [record[:width] + [""] * (width - len(record)) for record in body]
+    columns = dict(zip(header, zip(*body)))
+    empty = ("",) * len(body)
+
+    trading_dates = np.array([value.strip() for value in columns.get("BAS_DD", empty)], dtype=np.str_)
+    numeric = {field: parse_float_column(columns.get(field, empty)) for field in KRX_NUMERIC_FIELDS}
+    keep = (trading_dates != "") & ~(numeric["TDD_CLSPRC"] <= 0)
+    order = np.flatnonzero(keep)[np.argsort(trading_dates[keep], kind="stable")]
+
+    series = {"BAS_DD": trading_dates[order]}
+    for field in KRX_NUMERIC_FIELDS:
+        series[field] = numeric[field][order]
+    for field in KRX_IDENTITY_FIELDS:
+        series[field] = clean_cell(columns.get(field, empty)[order[-1]]) if len(order) else ""
+    return series
+
+
+def krx_cache_path(path, cache_dir):
+    return Path(cache_dir) / "krx" / f"{path.parent.name}_{path.stem}.npz"
+
+
+def read_krx_series_cache(cache_path, path, stat):
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if (
+                int(cached["version"]) != KRX_CACHE_VERSION
+                or str(cached["source"]) != str(path)
+                or int(cached["size"]) != stat.st_size
+                or int(cached["mtime_ns"]) != stat.st_mtime_ns
+            ):
+                return None
+            series = {"BAS_DD": cached["BAS_DD"]}
+            for field in KRX_NUMERIC_FIELDS:
+                series[field] = cached[field]
+            for field in KRX_IDENTITY_FIELDS:
+                series[field] = str(cached[field])
+            return series
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def write_krx_series_cache(cache_path, path, stat, series):
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.array(KRX_CACHE_VERSION),
+                source=np.array(str(path)),
+                size=np.array(stat.st_size),
+                mtime_ns=np.array(stat.st_mtime_ns),
+                **{field: series[field] for field in ("BAS_DD", *KRX_NUMERIC_FIELDS)},
+                **{field: np.array(series[field]) for field in KRX_IDENTITY_FIELDS},
+            )
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_krx_series(path, cache_dir=None):
+    if cache_dir is None:
+        return read_krx_series(path)
+
+    stat = path.stat()
+    cache_path = krx_cache_path(path, cache_dir)
+    series = read_krx_series_cache(cache_path, path, stat)
+    if series is not None:
+        return series
+    series = read_krx_series(path)
+    write_krx_series_cache(cache_path, path, stat, series)
+    return series
+
+
+KRX_PROBE_BYTES = 8192
+
+
+def read_probe_records(header, chunk):
+    text = chunk.replace(b"\x00", b"").decode("utf-8", errors="ignore")
+    records = []
+    for record in csv.reader(io.StringIO(text)):
+        if not record:
             continue
-        if parse_float(cleaned.get("TDD_CLSPRC", "")) <= 0:
+        row = dict(zip(header, record))
+        trading_date = clean_cell(row.get("BAS_DD", ""))
+        if not trading_date or parse_float(row.get("TDD_CLSPRC", "")) <= 0:
             continue
-        rows.append(cleaned)
-    rows.sort(key=lambda item: item.get("BAS_DD", ""))
-    return rows
+        records.append((trading_date, row))
+    return records
+
+
+def series_latest(series):
+    if not len(series["BAS_DD"]):
+        return None
+    return {
+        "BAS_DD": str(series["BAS_DD"][-1]),
+        "MKTCAP": float(series["MKTCAP"][-1]),
+        **{field: series[field] for field in KRX_IDENTITY_FIELDS},
+    }
+
+
+def probe_krx_latest(path, cache_dir=None):
+    if cache_dir is not None:
+        series = read_krx_series_cache(krx_cache_path(path, cache_dir), path, path.stat())
+        if series is not None:
+            return series_latest(series)
+
+    with path.open("rb") as handle:
+        head = handle.read(KRX_PROBE_BYTES)
+        size = handle.seek(0, os.SEEK_END)
+        tail_start = max(size - KRX_PROBE_BYTES, len(head))
+        handle.seek(tail_start)
+        tail = handle.read()
+
+    header_line, newline, head_body = head.partition(b"\n")
+    if newline and size > KRX_PROBE_BYTES * 2:
+        header = next(csv.reader([header_line.replace(b"\x00", b"").decode("utf-8-sig", errors="ignore")]), [])
+        head_records = read_probe_records(header, head_body.rpartition(b"\n")[0])
+        tail_records = read_probe_records(header, tail.partition(b"\n")[2])
+        head_dates = [trading_date for trading_date, _ in head_records]
+        tail_dates = [trading_date for trading_date, _ in tail_records]
+        if (
+            tail_dates
+            and head_dates == sorted(head_dates)
+            and tail_dates == sorted(tail_dates)
+            and (not head_dates or head_dates[-1] <= tail_dates[0])
+        ):
+            latest = tail_records[-1][1]
+            return {
+                "BAS_DD": tail_dates[-1],
+                "MKTCAP": parse_float(latest.get("MKTCAP", "")),
+                **{field: clean_cell(latest.get(field, "")) for field in KRX_IDENTITY_FIELDS},
+            }
+
+    return series_latest(load_krx_series(path, cache_dir))
 
 
 MARKET_REGIME_KEYWORDS = [
@@ -332,6 +569,64 @@ STOCK_NEWS_KEYWORDS = [
 ]
 
 
+def compile_keyword_matcher(groups):
+    goto = [{}]
+    output = [()]
+    entry_groups = []
+    for group_index, group in enumerate(groups):
+        for keyword in group["keywords"]:
+            state = 0
+            for ch in keyword.lower():
+                if ch not in goto[state]:
+                    goto.append({})
+                    output.append(())
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            output[state] += (len(entry_groups),)
+            entry_groups.append(group_index)
+
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    for state in queue:
+        for ch, next_state in goto[state].items():
+            fallback = fail[state]
+            while fallback and ch not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(ch, 0)
+            output[next_state] += output[fail[next_state]]
+            queue.append(next_state)
+
+    return {
+        "goto": goto,
+        "fail": fail,
+        "output": output,
+        "entry_groups": entry_groups,
+        "group_count": len(groups),
+    }
+
+
+def match_keyword_groups(matcher, text):
+    goto = matcher["goto"]
+    fail = matcher["fail"]
+    output = matcher["output"]
+    matched = set(output[0])
+    state = 0
+    for ch in text:
+        while state and ch not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(ch, 0)
+        if output[state]:
+            matched.update(output[state])
+    counts = [0] * matcher["group_count"]
+    for entry in matched:
+        counts[matcher["entry_groups"][entry]] += 1
+    return counts
+
+
+MARKET_REGIME_MATCHER = compile_keyword_matcher(MARKET_REGIME_KEYWORDS)
+STOCK_NEWS_MATCHER = compile_keyword_matcher(STOCK_NEWS_KEYWORDS)
+
+
 def normalize_trading_date(value):
     value = clean_cell(value).replace("-", "")
     if len(value) != 8 or not value.isdigit():
@@ -383,17 +678,72 @@ def news_quality_weight(score):
     return 0.72 + 0.28 * min(max(score / 100.0, 0.0), 1.0)
 
 
-def load_news_articles_index(path, min_tier="high"):
-    if path is None or not path.exists():
-        return {"date_only": {}, "precise": [], "stock_date_only": {}, "stock_precise": {}}
-    min_rank = quality_tier_rank(min_tier)
+NEWS_INDEX_VERSION = 4
+NEWS_INDEX_DIGEST_BYTES = 65536
+PICKLE_CACHE_ERRORS = (
+    OSError,
+    EOFError,
+    ValueError,
+    KeyError,
+    IndexError,
+    TypeError,
+    AttributeError,
+    ImportError,
+    pickle.UnpicklingError,
+)
 
-    raw = path.read_bytes().replace(b"\x00", b"")
-    text = raw.decode("utf-8-sig", errors="ignore")
-    reader = csv.DictReader(io.StringIO(text))
+
+def empty_news_index():
+    return {
+        "date_only": {},
+        "precise": [],
+        "precise_times": np.zeros(0, dtype=np.float64),
+        "stock_date_only": {},
+        "stock_precise": {},
+        "stock_precise_times": {},
+        "revision": {"generation": "", "changes": []},
+    }
+
+
+def sort_news_articles(articles):
+    times = np.array([article["published_at"].timestamp() for article in articles], dtype=np.float64)
+    order = np.argsort(times, kind="stable")
+    articles[:] = [articles[position] for position in order]
+    return times[order]
+
+
+def merge_news_times(articles, times):
+    existing = len(times)
+    appended = articles[existing:]
+    if not appended:
+        return times
+    appended_times = sort_news_articles(appended)
+    positions = np.searchsorted(times, appended_times, side="right")
+    merged = []
+    previous = 0
+    for position, article in zip(positions.tolist(), appended):
+        merged.extend(articles[previous:position])
+        merged.append(article)
+        previous = position
+    merged.extend(articles[previous:existing])
+    articles[:] = merged
+    return np.insert(times, positions, appended_times)
+
+
+def index_news_times(index):
+    index["precise_times"] = merge_news_times(index["precise"], index["precise_times"])
+    stock_times = index["stock_precise_times"]
+    for stock_key, articles in index["stock_precise"].items():
+        stock_times[stock_key] = merge_news_times(articles, stock_times.get(stock_key, np.zeros(0, dtype=np.float64)))
+    return index
+
+
+def ingest_news_rows(index, reader, min_rank):
     has_quality_tier = "qualityTier" in (reader.fieldnames or [])
-    index = {"date_only": {}, "precise": [], "stock_date_only": {}, "stock_precise": {}}
+    row_count = 0
+    earliest = ""
     for row in reader:
+        row_count += 1
         if has_quality_tier and quality_tier_rank(row.get("qualityTier", "")) < min_rank:
             continue
         title = clean_cell(row.get("title", ""))
@@ -404,26 +754,134 @@ def load_news_articles_index(path, min_tier="high"):
         stock_key = normalize_stock_signal_key(row.get("keyword", ""))
         quality_score = parse_int(row.get("qualityScore", "")) or 60
         published_at = parse_news_datetime(row.get("publishedAt", ""))
+        quality_weight = news_quality_weight(quality_score)
         article = {
             "published_at": published_at,
             "pub_date": "",
-            "text": normalized,
             "quality_score": quality_score,
             "stock_key": stock_key,
+            "market_scores": tuple(
+                count * quality_weight for count in match_keyword_groups(MARKET_REGIME_MATCHER, normalized)
+            ),
+            "stock_scores": tuple(
+                count * quality_weight for count in match_keyword_groups(STOCK_NEWS_MATCHER, normalized)
+            ),
         }
         if published_at is not None:
             article["pub_date"] = published_at.strftime("%Y%m%d")
             index["precise"].append(article)
             if stock_key:
                 index["stock_precise"].setdefault(stock_key, []).append(article)
-            continue
-        pub_date = normalize_trading_date(row.get("pubDate", ""))
-        if not pub_date:
-            continue
-        article["pub_date"] = pub_date
-        index["date_only"].setdefault(pub_date, []).append(article)
-        if stock_key:
-            index["stock_date_only"].setdefault(stock_key, {}).setdefault(pub_date, []).append(article)
+        else:
+            pub_date = normalize_trading_date(row.get("pubDate", ""))
+            if not pub_date:
+                continue
+            article["pub_date"] = pub_date
+            index["date_only"].setdefault(pub_date, []).append(article)
+            if stock_key:
+                index["stock_date_only"].setdefault(stock_key, {}).setdefault(pub_date, []).append(article)
+        if not earliest or article["pub_date"] < earliest:
+            earliest = article["pub_date"]
+    index["revision"]["changes"].append(earliest)
+    return row_count
+
+
+def news_keyword_signature():
+    payload = json.dumps([MARKET_REGIME_KEYWORDS, STOCK_NEWS_KEYWORDS], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def news_file_digests(handle, offset):
+    handle.seek(0)
+    head = hashlib.sha1(handle.read(min(offset, NEWS_INDEX_DIGEST_BYTES))).hexdigest()
+    tail_start = max(offset - NEWS_INDEX_DIGEST_BYTES, 0)
+    handle.seek(tail_start)
+    tail = hashlib.sha1(handle.read(offset - tail_start)).hexdigest()
+    return head, tail
+
+
+def read_news_index_cache(cache_path, path, min_tier, handle, size):
+    try:
+        with cache_path.open("rb") as cache_handle:
+            cached = pickle.load(cache_handle)
+        meta = cached["meta"]
+        if (
+            meta["version"] != NEWS_INDEX_VERSION
+            or meta["source"] != str(path)
+            or meta["min_tier"] != min_tier
+            or meta["keywords"] != news_keyword_signature()
+            or meta["offset"] > size
+            or list(news_file_digests(handle, meta["offset"])) != meta["digests"]
+        ):
+            return None
+        for article in cached["index"]["precise"]:
+            article["published_at"] = article["published_at"].replace(tzinfo=KST)
+        return cached
+    except PICKLE_CACHE_ERRORS:
+        return None
+
+
+def read_complete_lines(handle, start, size):
+    handle.seek(start)
+    chunk = handle.read(size - start)
+    return chunk[: chunk.rfind(b"\n") + 1]
+
+
+def write_pickle_cache(cache_path, payload):
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as handle:
+            pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_news_articles_index(path, min_tier="high", cache_dir=None):
+    if path is None or not path.exists():
+        return empty_news_index()
+    min_rank = quality_tier_rank(min_tier)
+    cache_path = Path(cache_dir) / "news_index.pkl" if cache_dir is not None else None
+
+    with path.open("rb") as handle:
+        size = handle.seek(0, os.SEEK_END)
+        cached = read_news_index_cache(cache_path, path, min_tier, handle, size) if cache_path else None
+        if cached is not None:
+            index = cached["index"]
+            meta = cached["meta"]
+            chunk = read_complete_lines(handle, meta["offset"], size)
+            if not chunk:
+                return index
+            offset = meta["offset"] + len(chunk)
+            text = chunk.replace(b"\x00", b"").decode("utf-8", errors="ignore")
+            reader = csv.DictReader(io.StringIO(text), fieldnames=meta["fieldnames"])
+            row_count = meta["row_count"] + ingest_news_rows(index, reader, min_rank)
+            fieldnames = meta["fieldnames"]
+        else:
+            chunk = read_complete_lines(handle, 0, size)
+            offset = len(chunk)
+            text = chunk.replace(b"\x00", b"").decode("utf-8-sig", errors="ignore")
+            reader = csv.DictReader(io.StringIO(text))
+            index = empty_news_index()
+            index["revision"]["generation"] = os.urandom(8).hex()
+            row_count = ingest_news_rows(index, reader, min_rank)
+            fieldnames = reader.fieldnames or []
+        digests = news_file_digests(handle, offset)
+    index_news_times(index)
+
+    if cache_path is not None and fieldnames:
+        meta = {
+            "version": NEWS_INDEX_VERSION,
+            "source": str(path),
+            "min_tier": min_tier,
+            "keywords": news_keyword_signature(),
+            "fieldnames": list(fieldnames),
+            "offset": offset,
+            "row_count": row_count,
+            "digests": list(digests),
+        }
+        write_pickle_cache(cache_path, {"meta": meta, "index": index})
     return index
 
 
@@ -440,6 +898,14 @@ def trading_window_bounds(previous_date, current_date):
     return window_start, window_end
 
 
+def window_precise_articles(articles, times, window_start, window_end):
+    if times is None or not len(times):
+        return []
+    start = int(np.searchsorted(times, window_start.timestamp(), side="left"))
+    end = int(np.searchsorted(times, window_end.timestamp(), side="right"))
+    return articles[start:end]
+
+
 def collect_window_articles(news_index, previous_date, current_date):
     if not news_index:
         return [], []
@@ -450,10 +916,12 @@ def collect_window_articles(news_index, previous_date, current_date):
     if window_start is None or window_end is None:
         return previous_articles, current_articles
 
-    for article in news_index.get("precise", []):
-        published_at = article.get("published_at")
-        if published_at is None or published_at < window_start or published_at > window_end:
-            continue
+    for article in window_precise_articles(
+        news_index.get("precise", []),
+        news_index.get("precise_times"),
+        window_start,
+        window_end,
+    ):
         if article.get("pub_date") == previous_date:
             previous_articles.append(article)
         elif article.get("pub_date") == current_date:
@@ -478,13 +946,10 @@ def compute_window_market_regime(previous_articles, current_articles):
     for bucket_name, articles in (("previous", previous_articles), ("current", current_articles)):
         bucket_weight = 1.15 if bucket_name == "current" else 1.0
         for article in articles:
-            text = article.get("text", "")
-            quality_weight = news_quality_weight(article.get("quality_score", 60))
-            for group in MARKET_REGIME_KEYWORDS:
-                match_count = sum(1 for keyword in group["keywords"] if keyword.lower() in text)
-                if match_count == 0:
+            for group, group_score in zip(MARKET_REGIME_KEYWORDS, article["market_scores"]):
+                if group_score == 0:
                     continue
-                score = match_count * group["weight"] * bucket_weight * quality_weight
+                score = group_score * group["weight"] * bucket_weight
                 if group["direction"] == "risk_on":
                     risk_on += score
                 else:
@@ -520,37 +985,54 @@ def compute_window_market_regime(previous_articles, current_articles):
     }
 
 
-def build_market_news_features(rows, news_index, regime_cache):
-    count = len(rows)
-    risk_on = np.zeros(count, dtype=np.float32)
-    risk_off = np.zeros(count, dtype=np.float32)
-    confidence = np.zeros(count, dtype=np.float32)
-    sentiment = np.zeros(count, dtype=np.float32)
-    intensity = np.zeros(count, dtype=np.float32)
+MARKET_REGIME_FIELDS = ("risk_on_prob", "risk_off_prob", "confidence", "sentiment", "item_count")
 
-    trading_dates = [normalize_trading_date(row.get("BAS_DD", "")) for row in rows]
-    for idx, current_date in enumerate(trading_dates):
-        if not current_date:
-            continue
+
+def market_regime_for_window(news_index, regime_cache, previous_date, current_date):
+    key = (previous_date, current_date)
+    regime = regime_cache.get(key)
+    if regime is None:
+        previous_articles, current_articles = collect_window_articles(news_index, previous_date, current_date)
+        regime = compute_window_market_regime(previous_articles, current_articles)
+        regime_cache[key] = regime
+    return regime
+
+
+def build_market_regime_table(calendar, news_index, regime_cache):
+    dates = np.array(sorted(set(calendar) - {""}), dtype=np.str_)
+    values = np.zeros((len(dates), len(MARKET_REGIME_FIELDS)), dtype=np.float32)
+    for idx, current_date in enumerate(dates):
+        previous_date = str(dates[idx - 1]) if idx > 0 else ""
+        regime = market_regime_for_window(news_index, regime_cache, previous_date, str(current_date))
+        values[idx] = [regime[field] for field in MARKET_REGIME_FIELDS]
+    return {"dates": dates, "values": values}
+
+
+def align_calendar_rows(trading_dates, calendar_dates):
+    count = len(trading_dates)
+    dates = np.array(trading_dates, dtype=np.str_).reshape(count)
+    positions = np.searchsorted(calendar_dates, dates)
+    found = positions < len(calendar_dates)
+    found[found] = calendar_dates[positions[found]] == dates[found]
+    found &= dates != ""
+    aligned = np.zeros(count, dtype=bool)
+    aligned[1:] = found[1:] & found[:-1] & (positions[1:] == positions[:-1] + 1)
+    return dates, positions, aligned
+
+
+def build_market_news_features(trading_dates, news_index, regime_cache, regime_table=None):
+    if regime_table is None:
+        regime_table = build_market_regime_table(trading_dates, news_index, regime_cache)
+    values = np.zeros((len(trading_dates), len(MARKET_REGIME_FIELDS)), dtype=np.float32)
+    dates, positions, aligned = align_calendar_rows(trading_dates, regime_table["dates"])
+    values[aligned] = regime_table["values"][positions[aligned]]
+
+    for idx in np.flatnonzero(~aligned & (dates != "")):
         previous_date = trading_dates[idx - 1] if idx > 0 else ""
-        key = (previous_date, current_date)
-        regime = regime_cache.get(key)
-        if regime is None:
-            previous_articles, current_articles = collect_window_articles(
-                news_index, previous_date, current_date
-            )
-            regime = compute_window_market_regime(
-                previous_articles,
-                current_articles,
-            )
-            regime_cache[key] = regime
-        risk_on[idx] = regime["risk_on_prob"]
-        risk_off[idx] = regime["risk_off_prob"]
-        confidence[idx] = regime["confidence"]
-        sentiment[idx] = regime["sentiment"]
-        intensity[idx] = regime["item_count"]
+        regime = market_regime_for_window(news_index, regime_cache, previous_date, trading_dates[idx])
+        values[idx] = [regime[field] for field in MARKET_REGIME_FIELDS]
 
-    return risk_on, risk_off, confidence, sentiment, intensity
+    return tuple(values[:, column] for column in range(len(MARKET_REGIME_FIELDS)))
 
 
 def collect_window_stock_articles(news_index, stock_key, previous_date, current_date):
@@ -567,10 +1049,12 @@ def collect_window_stock_articles(news_index, stock_key, previous_date, current_
     if window_start is None or window_end is None:
         return previous_articles, current_articles
 
-    for article in news_index.get("stock_precise", {}).get(stock_key, []):
-        published_at = article.get("published_at")
-        if published_at is None or published_at < window_start or published_at > window_end:
-            continue
+    for article in window_precise_articles(
+        news_index.get("stock_precise", {}).get(stock_key, []),
+        news_index.get("stock_precise_times", {}).get(stock_key),
+        window_start,
+        window_end,
+    ):
         if article.get("pub_date") == previous_date:
             previous_articles.append(article)
         elif article.get("pub_date") == current_date:
@@ -578,8 +1062,24 @@ def collect_window_stock_articles(news_index, stock_key, previous_date, current_
     return previous_articles, current_articles
 
 
-def compute_window_stock_signal(previous_articles, current_articles):
-    article_count = len(previous_articles) + len(current_articles)
+STOCK_SIGNAL_FIELDS = ("score", "sentiment", "buzz", "article_count", "positive_score", "negative_score")
+
+
+def stock_article_scores(article, bucket_weight):
+    positive_score = 0.0
+    negative_score = 0.0
+    for group, group_score in zip(STOCK_NEWS_KEYWORDS, article["stock_scores"]):
+        if group_score == 0:
+            continue
+        score = group_score * group["weight"] * bucket_weight
+        if group["direction"] == "positive":
+            positive_score += score
+        else:
+            negative_score += score
+    return positive_score, negative_score
+
+
+def stock_signal_from_totals(article_count, positive_score, negative_score, directional_articles):
     if article_count == 0:
         return {
             "score": 50.0,
@@ -590,31 +1090,6 @@ def compute_window_stock_signal(previous_articles, current_articles):
             "negative_score": 0.0,
         }
 
-    positive_score = 0.0
-    negative_score = 0.0
-    directional_articles = 0
-
-    for bucket_name, articles in (("previous", previous_articles), ("current", current_articles)):
-        bucket_weight = 1.15 if bucket_name == "current" else 1.0
-        for article in articles:
-            text = article.get("text", "")
-            quality_weight = news_quality_weight(article.get("quality_score", 60))
-            article_positive = 0.0
-            article_negative = 0.0
-            for group in STOCK_NEWS_KEYWORDS:
-                match_count = sum(1 for keyword in group["keywords"] if keyword.lower() in text)
-                if match_count == 0:
-                    continue
-                score = match_count * group["weight"] * bucket_weight * quality_weight
-                if group["direction"] == "positive":
-                    positive_score += score
-                    article_positive += score
-                else:
-                    negative_score += score
-                    article_negative += score
-            if article_positive > 0 or article_negative > 0:
-                directional_articles += 1
-
     directional_total = positive_score + negative_score
     if directional_total <= 0:
         return {
@@ -649,116 +1124,283 @@ def compute_window_stock_signal(previous_articles, current_articles):
     }
 
 
-def build_stock_news_features(rows, stock_name, news_index, stock_signal_cache):
-    count = len(rows)
-    score = np.full(count, 50.0, dtype=np.float32)
-    sentiment = np.zeros(count, dtype=np.float32)
-    buzz = np.zeros(count, dtype=np.float32)
-    article_count = np.zeros(count, dtype=np.float32)
-    positive_score = np.zeros(count, dtype=np.float32)
-    negative_score = np.zeros(count, dtype=np.float32)
+def compute_window_stock_signal(previous_articles, current_articles):
+    positive_score = 0.0
+    negative_score = 0.0
+    directional_articles = 0
 
-    stock_key = normalize_stock_signal_key(stock_name)
-    if not stock_key:
-        return score, sentiment, buzz, article_count, positive_score, negative_score
+    for bucket_name, articles in (("previous", previous_articles), ("current", current_articles)):
+        bucket_weight = 1.15 if bucket_name == "current" else 1.0
+        for article in articles:
+            article_positive, article_negative = stock_article_scores(article, bucket_weight)
+            positive_score += article_positive
+            negative_score += article_negative
+            if article_positive > 0 or article_negative > 0:
+                directional_articles += 1
+
+    return stock_signal_from_totals(
+        len(previous_articles) + len(current_articles),
+        positive_score,
+        negative_score,
+        directional_articles,
+    )
+
+
+def stock_signal_for_window(news_index, stock_signal_cache, stock_key, previous_date, current_date):
+    key = (stock_key, previous_date, current_date)
+    signal = stock_signal_cache.get(key)
+    if signal is None:
+        previous_articles, current_articles = collect_window_stock_articles(
+            news_index,
+            stock_key,
+            previous_date,
+            current_date,
+        )
+        signal = compute_window_stock_signal(previous_articles, current_articles)
+        stock_signal_cache[key] = signal
+    return signal
+
+
+def build_stock_news_table(calendar, news_index, stock_keys):
+    dates = np.array(sorted(set(calendar) - {""}), dtype=np.str_)
+    positions = {trading_date: idx for idx, trading_date in enumerate(dates.tolist())}
+    stocks = {}
+    for stock_key in sorted(set(stock_keys) - {""}):
+        totals = {}
+
+        def add_article(position, article, bucket_weight):
+            article_positive, article_negative = stock_article_scores(article, bucket_weight)
+            total = totals.setdefault(position, [0, 0.0, 0.0, 0])
+            total[0] += 1
+            total[1] += article_positive
+            total[2] += article_negative
+            if article_positive > 0 or article_negative > 0:
+                total[3] += 1
+
+        for pub_date, articles in news_index.get("stock_date_only", {}).get(stock_key, {}).items():
+            position = positions.get(pub_date)
+            if position is None:
+                continue
+            for article in articles:
+                if position + 1 < len(dates):
+                    add_article(position + 1, article, 1.0)
+                if position > 0:
+                    add_article(position, article, 1.15)
+        for article in news_index.get("stock_precise", {}).get(stock_key, []):
+            position = positions.get(article["pub_date"])
+            if position is None:
+                continue
+            clock = article["published_at"].time()
+            if clock >= dt_time(20, 0) and position + 1 < len(dates):
+                add_article(position + 1, article, 1.0)
+            if clock <= dt_time(8, 0) and position > 0:
+                add_article(position, article, 1.15)
 
-    trading_dates = [normalize_trading_date(row.get("BAS_DD", "")) for row in rows]
-    for idx, current_date in enumerate(trading_dates):
-        if not current_date:
+        if not totals:
             continue
+        stock_positions = np.array(sorted(totals), dtype=np.int64)
+        values = np.zeros((len(stock_positions), len(STOCK_SIGNAL_FIELDS)), dtype=np.float32)
+        for row, position in enumerate(stock_positions):
+            signal = stock_signal_from_totals(*totals[int(position)])
+            values[row] = [signal[field] for field in STOCK_SIGNAL_FIELDS]
+        stocks[stock_key] = {"positions": stock_positions, "values": values}
+    return {"dates": dates, "stocks": stocks}
+
+
+def build_stock_news_features(trading_dates, stock_name, news_index, stock_signal_cache, stock_news_table=None):
+    count = len(trading_dates)
+    values = np.zeros((count, len(STOCK_SIGNAL_FIELDS)), dtype=np.float32)
+    values[:, STOCK_SIGNAL_FIELDS.index("score")] = 50.0
+
+    stock_key = normalize_stock_signal_key(stock_name)
+    if not stock_key:
+        return tuple(values[:, column] for column in range(len(STOCK_SIGNAL_FIELDS)))
+    if stock_news_table is None:
+        stock_news_table = build_stock_news_table(trading_dates, news_index, [stock_key])
+
+    dates, positions, aligned = align_calendar_rows(trading_dates, stock_news_table["dates"])
+    entry = stock_news_table["stocks"].get(stock_key)
+    if entry is not None and aligned.any():
+        rows = np.flatnonzero(aligned)
+        slots = np.searchsorted(entry["positions"], positions[rows])
+        slots_clipped = np.minimum(slots, len(entry["positions"]) - 1)
+        hit = entry["positions"][slots_clipped] == positions[rows]
+        values[rows[hit]] = entry["values"][slots_clipped[hit]]
+
+    for idx in np.flatnonzero(~aligned & (dates != "")):
         previous_date = trading_dates[idx - 1] if idx > 0 else ""
-        key = (stock_key, previous_date, current_date)
-        signal = stock_signal_cache.get(key)
-        if signal is None:
-            previous_articles, current_articles = collect_window_stock_articles(
-                news_index,
-                stock_key,
-                previous_date,
-                current_date,
-            )
-            signal = compute_window_stock_signal(previous_articles, current_articles)
-            stock_signal_cache[key] = signal
-        score[idx] = signal["score"]
-        sentiment[idx] = signal["sentiment"]
-        buzz[idx] = signal["buzz"]
-        article_count[idx] = signal["article_count"]
-        positive_score[idx] = signal["positive_score"]
-        negative_score[idx] = signal["negative_score"]
+        signal = stock_signal_for_window(news_index, stock_signal_cache, stock_key, previous_date, trading_dates[idx])
+        values[idx] = [signal[field] for field in STOCK_SIGNAL_FIELDS]
+
+    return tuple(values[:, column] for column in range(len(STOCK_SIGNAL_FIELDS)))
 
-    return score, sentiment, buzz, article_count, positive_score, negative_score
 
+NXT_INDEX_VERSION = 2
+NXT_QUOTE_FIELDS = (
+    "current_price",
+    "change_rate",
+    "open_price",
+    "high_price",
+    "low_price",
+    "trade_value",
+    "volume",
+)
 
-def load_nxt_snapshot_index(nxt_dir):
+
+def empty_nxt_index():
+    return {"symbols": {}, "days": {}, "by_symbol": {}}
+
+
+def parse_nxt_snapshot(path, symbols):
+    entry = {
+        "trading_date": "",
+        "symbol_ids": np.zeros(0, dtype=np.int32),
+        "quotes": np.zeros((0, len(NXT_QUOTE_FIELDS)), dtype=np.float64),
+    }
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return entry
+    trading_date = normalize_trading_date(payload.get("trading_date", ""))
+    if not trading_date:
+        return entry
+
+    quotes = []
+    day_index = {}
+    for item in payload.get("items", []):
+        market = clean_cell(item.get("market", "")).upper()
+        code = normalize_security_code(item.get("code", "")) or normalize_security_code(item.get("short_code", ""))
+        if not code:
+            continue
+        quotes.append([parse_float(item.get(field, 0.0)) for field in NXT_QUOTE_FIELDS])
+        day_index[make_prediction_key(market, code)] = len(quotes) - 1
+        day_index.setdefault(code, len(quotes) - 1)
+    if not day_index:
+        return entry
+
+    symbol_ids = np.array([symbols.setdefault(key, len(symbols)) for key in day_index], dtype=np.int32)
+    rows = np.array(list(day_index.values()), dtype=np.int64)
+    order = np.argsort(symbol_ids)
+    entry["trading_date"] = trading_date
+    entry["symbol_ids"] = symbol_ids[order]
+    entry["quotes"] = np.array(quotes, dtype=np.float64)[rows[order]]
+    return entry
+
+
+def load_nxt_snapshot_index(nxt_dir, cache_dir=None):
     if nxt_dir is None:
-        return {}
+        return empty_nxt_index()
     nxt_dir = Path(nxt_dir)
     if not nxt_dir.exists() or not nxt_dir.is_dir():
-        return {}
+        return empty_nxt_index()
 
-    index = {}
+    cache_path = Path(cache_dir) / "nxt_index.pkl" if cache_dir is not None else None
+    cached = {"version": NXT_INDEX_VERSION, "source": str(nxt_dir), "symbols": {}, "files": {}}
+    if cache_path is not None:
+        try:
+            with cache_path.open("rb") as handle:
+                payload = pickle.load(handle)
+            if payload["version"] == NXT_INDEX_VERSION and payload["source"] == str(nxt_dir):
+                cached = payload
+        except PICKLE_CACHE_ERRORS:
+            pass
+
+    symbols = cached["symbols"]
+    files = {}
+    changed = False
     for path in sorted(nxt_dir.glob("nxt_snapshot_*.json")):
         try:
-            payload = json.loads(path.read_text(encoding="utf-8"))
-        except (OSError, json.JSONDecodeError):
+            stat = path.stat()
+        except OSError:
             continue
-        trading_date = normalize_trading_date(payload.get("trading_date", ""))
-        if not trading_date:
-            continue
-        day_index = {}
-        for item in payload.get("items", []):
-            market = clean_cell(item.get("market", "")).upper()
-            code = normalize_security_code(item.get("code", "")) or normalize_security_code(item.get("short_code", ""))
-            if not code:
-                continue
-            quote = {
-                "current_price": parse_float(item.get("current_price", 0.0)),
-                "change_rate": parse_float(item.get("change_rate", 0.0)),
-                "open_price": parse_float(item.get("open_price", 0.0)),
-                "high_price": parse_float(item.get("high_price", 0.0)),
-                "low_price": parse_float(item.get("low_price", 0.0)),
-                "trade_value": parse_float(item.get("trade_value", 0.0)),
-                "volume": parse_float(item.get("volume", 0.0)),
-            }
-            day_index[make_prediction_key(market, code)] = quote
-            day_index.setdefault(code, quote)
-        if day_index:
-            index[trading_date] = day_index
-    return index
+        entry = cached["files"].get(path.name)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = parse_nxt_snapshot(path, symbols)
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+            changed = True
+        files[path.name] = entry
+    changed = changed or set(files) != set(cached["files"])
+
+    if cache_path is not None and changed:
+        write_pickle_cache(
+            cache_path,
+            {"version": NXT_INDEX_VERSION, "source": str(nxt_dir), "symbols": symbols, "files": files},
+        )
+
+    days = {}
+    for name in sorted(files):
+        entry = files[name]
+        if entry["trading_date"] and len(entry["symbol_ids"]):
+            days[entry["trading_date"]] = entry
+    return {"symbols": symbols, "days": days, "by_symbol": index_nxt_symbols(days)}
 
 
-def build_nxt_features(rows, stock_market, stock_code, market_caps, avg_turnover_ratio_20, nxt_index):
-    count = len(rows)
+def index_nxt_symbols(days):
+    entries = [days[trading_date] for trading_date in sorted(days)]
+    if not entries:
+        return {}
+    symbol_ids = np.concatenate([entry["symbol_ids"] for entry in entries])
+    dates = np.repeat(
+        np.array([entry["trading_date"] for entry in entries], dtype=np.str_),
+        [len(entry["symbol_ids"]) for entry in entries],
+    )
+    quotes = np.concatenate([entry["quotes"] for entry in entries])
+    order = np.argsort(symbol_ids, kind="stable")
+    symbol_ids, dates, quotes = symbol_ids[order], dates[order], quotes[order]
+    starts = np.flatnonzero(np.r_[True, symbol_ids[1:] != symbol_ids[:-1]])
+    ends = np.r_[starts[1:], len(symbol_ids)]
+    return {
+        int(symbol_ids[start]): {"dates": dates[start:end], "quotes": quotes[start:end]}
+        for start, end in zip(starts, ends)
+    }
+
+
+def nxt_symbol_quotes(nxt_index, symbol_id, dates):
+    quotes = np.zeros((len(dates), len(NXT_QUOTE_FIELDS)), dtype=np.float64)
+    found = np.zeros(len(dates), dtype=bool)
+    entry = nxt_index.get("by_symbol", {}).get(symbol_id)
+    if entry is None or not len(dates):
+        return quotes, found
+    slots = np.minimum(np.searchsorted(entry["dates"], dates), len(entry["dates"]) - 1)
+    found = (entry["dates"][slots] == dates) & (dates != "")
+    quotes[found] = entry["quotes"][slots[found]]
+    return quotes, found
+
+
+def build_nxt_features(trading_dates, stock_market, stock_code, market_caps, avg_turnover_ratio_20, nxt_index):
+    count = len(trading_dates)
     change_rate = np.zeros(count, dtype=np.float32)
     intraday_return = np.zeros(count, dtype=np.float32)
     close_strength = np.full(count, 50.0, dtype=np.float32)
     trade_value_ratio = np.zeros(count, dtype=np.float32)
     available = np.zeros(count, dtype=np.float32)
 
-    if not stock_code or not nxt_index:
+    if not stock_code or not nxt_index.get("days"):
         trade_value_impulse = np.zeros(count, dtype=np.float32)
         return change_rate, intraday_return, close_strength, trade_value_ratio, trade_value_impulse, available
 
-    for idx, row in enumerate(rows):
-        trading_date = normalize_trading_date(row.get("BAS_DD", ""))
-        if not trading_date:
-            continue
-        day_quotes = nxt_index.get(trading_date, {})
-        quote = day_quotes.get(make_prediction_key(stock_market, stock_code)) or day_quotes.get(stock_code)
-        if not quote:
-            continue
-        current_price = float(quote.get("current_price", 0.0))
-        open_price = float(quote.get("open_price", 0.0))
-        high_price = float(quote.get("high_price", 0.0))
-        low_price = float(quote.get("low_price", 0.0))
-        trade_value = float(quote.get("trade_value", 0.0))
-
-        change_rate[idx] = float(quote.get("change_rate", 0.0))
-        intraday_return[idx] = pct_change(current_price, open_price)
-        if high_price > low_price:
-            close_strength[idx] = ((current_price - low_price) / (high_price - low_price)) * 100.0
-        if market_caps[idx] > 0:
-            trade_value_ratio[idx] = (trade_value / market_caps[idx]) * 100.0
-        available[idx] = 1.0
+    if "by_symbol" not in nxt_index:
+        nxt_index["by_symbol"] = index_nxt_symbols(nxt_index["days"])
+    dates = np.array(trading_dates, dtype=np.str_).reshape(count)
+    quotes, found = nxt_symbol_quotes(nxt_index, nxt_index["symbols"].get(make_prediction_key(stock_market, stock_code)), dates)
+    code_quotes, code_found = nxt_symbol_quotes(nxt_index, nxt_index["symbols"].get(stock_code), dates)
+    fallback = code_found & ~found
+    quotes[fallback] = code_quotes[fallback]
+    found |= fallback
+
+    current_price, quote_change_rate, open_price, high_price, low_price, trade_value, _ = quotes.T
+    market_caps = np.asarray(market_caps, dtype=np.float64)
+    change_rate[found] = quote_change_rate[found]
+    opened = found & (open_price != 0)
+    intraday_return[opened] = (current_price[opened] / open_price[opened] - 1.0) * 100.0
+    ranged = found & (high_price > low_price)
+    close_strength[ranged] = (
+        (current_price[ranged] - low_price[ranged]) / (high_price[ranged] - low_price[ranged])
+    ) * 100.0
+    capped = found & (market_caps > 0)
+    trade_value_ratio[capped] = (trade_value[capped] / market_caps[capped]) * 100.0
+    available[found] = 1.0
 
     trade_value_impulse = np.divide(
         trade_value_ratio,
@@ -769,281 +1411,705 @@ def build_nxt_features(rows, stock_market, stock_code, market_caps, avg_turnover
     return change_rate, intraday_return, close_strength, trade_value_ratio, trade_value_impulse, available
 
 
-def build_feature_matrix(rows, stock_name="", news_index=None, regime_cache=None, stock_signal_cache=None, nxt_index=None):
-    closes = np.array([parse_float(row.get("TDD_CLSPRC", "")) for row in rows], dtype=np.float32)
-    highs = np.array([parse_float(row.get("TDD_HGPRC", "")) for row in rows], dtype=np.float32)
-    lows = np.array([parse_float(row.get("TDD_LWPRC", "")) for row in rows], dtype=np.float32)
-    opens = np.array([parse_float(row.get("TDD_OPNPRC", "")) for row in rows], dtype=np.float32)
-    turnovers = np.array([parse_float(row.get("ACC_TRDVAL", "")) for row in rows], dtype=np.float32)
-    market_caps = np.array([parse_float(row.get("MKTCAP", "")) for row in rows], dtype=np.float32)
-    volumes = np.array([parse_float(row.get("ACC_TRDVOL", "")) for row in rows], dtype=np.float32)
-    stock_market = clean_cell(rows[-1].get("MKT_NM", "")).upper() if rows else ""
-    stock_code = normalize_security_code(rows[-1].get("ISU_CD", "")) if rows else ""
-
-    returns_1d = np.zeros_like(closes, dtype=np.float32)
-    returns_1d[1:] = (closes[1:] / closes[:-1] - 1.0) * 100.0
-    returns_2d = np.zeros_like(closes, dtype=np.float32)
-    returns_2d[2:] = (closes[2:] / closes[:-2] - 1.0) * 100.0
-    returns_3d = np.zeros_like(closes, dtype=np.float32)
-    returns_3d[3:] = (closes[3:] / closes[:-3] - 1.0) * 100.0
-    returns_5d = np.zeros_like(closes, dtype=np.float32)
-    returns_5d[5:] = (closes[5:] / closes[:-5] - 1.0) * 100.0
-
-    intraday_range = np.divide(
+FEATURE_NAMES = (
+    "returns_1d",
+    "returns_2d",
+    "returns_3d",
+    "returns_5d",
+    "intraday_range",
+    "open_close_gap",
+    "gap_from_prev_close",
+    "turnover_ratio",
+    "turnover_ratio_vs_avg20",
+    "volume_ratio",
+    "close_vs_ma5",
+    "close_vs_ma10",
+    "close_vs_ma20",
+    "close_vs_ma60",
+    "volatility_20",
+    "range_ratio",
+    "close_vs_high20",
+    "close_vs_low20",
+    "close_location",
+    "nxt_change_rate",
+    "nxt_intraday_return",
+    "nxt_close_strength",
+    "nxt_trade_value_ratio",
+    "nxt_trade_value_impulse",
+    "nxt_available",
+    "news_risk_on",
+    "news_risk_off",
+    "news_confidence",
+    "news_sentiment",
+    "news_intensity",
+    "stock_news_score",
+    "stock_news_sentiment",
+    "stock_news_buzz",
+    "stock_news_article_count",
+    "stock_news_positive_score",
+    "stock_news_negative_score",
+)
+MODEL_FEATURE_SETS = {DEFAULT_MODEL_VERSION: FEATURE_NAMES}
+FEATURE_GROUPS = ("price", "nxt", "market_news", "stock_news")
+FEATURE_BATCH_SIZE = 256
+FEATURE_STORE_VERSION = 3
+
+
+def pack_series_panel(series_list):
+    lengths = np.array([len(series["BAS_DD"]) for series in series_list], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    fields = {}
+    for field in ("TDD_CLSPRC", "TDD_HGPRC", "TDD_LWPRC", "TDD_OPNPRC", "ACC_TRDVAL", "MKTCAP", "ACC_TRDVOL"):
+        values = np.zeros((len(series_list), width), dtype=np.float32)
+        for row, series in enumerate(series_list):
+            column = series[field].astype(np.float32)
+            values[row, : len(column)] = column
+            if len(column):
+                values[row, len(column) :] = column[-1]
+        fields[field] = values
+    return {
+        "lengths": lengths,
+        "fields": fields,
+        "trading_dates": [[normalize_trading_date(value) for value in series["BAS_DD"]] for series in series_list],
+    }
+
+
+def lagged_returns(closes, lag):
+    returns = np.zeros_like(closes, dtype=np.float32)
+    returns[:, lag:] = (closes[:, lag:] / closes[:, :-lag] - 1.0) * 100.0
+    return returns
+
+
+def gap_pct(values, reference):
+    return np.divide(
+        (values - reference) * 100.0,
+        reference,
+        out=np.zeros_like(values, dtype=np.float32),
+        where=reference > 0,
+    )
+
+
+def ratio_to_average(values, average, floor, where):
+    return np.divide(
+        values,
+        np.maximum(average, floor),
+        out=np.zeros_like(values, dtype=np.float32),
+        where=where,
+    )
+
+
+def compute_intraday_range(context, highs, lows, closes):
+    return np.divide(
         (highs - lows) * 100.0,
         closes,
         out=np.zeros_like(closes, dtype=np.float32),
         where=closes > 0,
     )
-    open_close_gap = np.divide(
-        (closes - opens) * 100.0,
-        opens,
-        out=np.zeros_like(opens, dtype=np.float32),
-        where=opens > 0,
-    )
-    turnover_ratio = np.divide(
+
+
+def compute_turnover_ratio(context, turnovers, market_caps):
+    return np.divide(
         turnovers * 100.0,
         market_caps,
         out=np.zeros_like(turnovers, dtype=np.float32),
         where=market_caps > 0,
     )
-    avg_turnover_ratio_20 = rolling_mean(turnover_ratio, 20)
-    turnover_ratio_vs_avg20 = np.divide(
-        turnover_ratio,
-        np.maximum(avg_turnover_ratio_20, 1e-3),
-        out=np.zeros_like(turnover_ratio, dtype=np.float32),
-        where=avg_turnover_ratio_20 > 0,
-    )
-    volume_ratio = np.divide(
-        volumes,
-        np.maximum(rolling_mean(volumes, 20), 1.0),
-        out=np.zeros_like(volumes, dtype=np.float32),
-        where=volumes > 0,
-    )
-    prev_closes = np.roll(closes, 1)
-    prev_closes[0] = closes[0]
-    gap_from_prev_close = np.divide(
-        (opens - prev_closes) * 100.0,
-        prev_closes,
-        out=np.zeros_like(opens, dtype=np.float32),
-        where=prev_closes > 0,
-    )
 
-    ma5 = rolling_mean(closes, 5)
-    ma10 = rolling_mean(closes, 10)
-    ma20 = rolling_mean(closes, 20)
-    ma60 = rolling_mean(closes, 60)
-    close_vs_ma5 = np.divide(
-        (closes - ma5) * 100.0,
-        ma5,
-        out=np.zeros_like(closes, dtype=np.float32),
-        where=ma5 > 0,
-    )
-    close_vs_ma10 = np.divide(
-        (closes - ma10) * 100.0,
-        ma10,
-        out=np.zeros_like(closes, dtype=np.float32),
-        where=ma10 > 0,
-    )
-    close_vs_ma20 = np.divide(
-        (closes - ma20) * 100.0,
-        ma20,
-        out=np.zeros_like(closes, dtype=np.float32),
-        where=ma20 > 0,
-    )
-    close_vs_ma60 = np.divide(
-        (closes - ma60) * 100.0,
-        ma60,
-        out=np.zeros_like(closes, dtype=np.float32),
-        where=ma60 > 0,
-    )
-    volatility_20 = rolling_std(returns_1d, 20)
-    avg_range_20 = np.maximum(rolling_mean(intraday_range, 20), 1e-3)
-    range_ratio = np.divide(
-        intraday_range,
-        avg_range_20,
-        out=np.zeros_like(intraday_range, dtype=np.float32),
-        where=avg_range_20 > 0,
-    )
-    high_window_20 = rolling_max(highs, 20)
-    low_window_20 = rolling_min(lows, 20)
-    close_vs_high20 = np.divide(
-        (closes - high_window_20) * 100.0,
-        high_window_20,
-        out=np.zeros_like(closes, dtype=np.float32),
-        where=high_window_20 > 0,
-    )
-    close_vs_low20 = np.divide(
-        (closes - low_window_20) * 100.0,
-        low_window_20,
-        out=np.zeros_like(closes, dtype=np.float32),
-        where=low_window_20 > 0,
-    )
-    day_range = np.maximum(highs - lows, 1e-3)
-    close_location = np.divide(
+
+def compute_prev_close(context, closes):
+    prev_closes = np.roll(closes, 1, axis=-1)
+    prev_closes[:, :1] = closes[:, :1]
+    return prev_closes
+
+
+def compute_close_location(context, closes, lows, day_range):
+    return np.divide(
         closes - lows,
         day_range,
         out=np.full_like(closes, 0.5, dtype=np.float32),
         where=day_range > 0,
     )
-    news_risk_on = np.zeros_like(closes, dtype=np.float32)
-    news_risk_off = np.zeros_like(closes, dtype=np.float32)
-    news_confidence = np.zeros_like(closes, dtype=np.float32)
-    news_sentiment = np.zeros_like(closes, dtype=np.float32)
-    news_intensity = np.zeros_like(closes, dtype=np.float32)
-    stock_news_score = np.full_like(closes, 50.0, dtype=np.float32)
-    stock_news_sentiment = np.zeros_like(closes, dtype=np.float32)
-    stock_news_buzz = np.zeros_like(closes, dtype=np.float32)
-    stock_news_article_count = np.zeros_like(closes, dtype=np.float32)
-    stock_news_positive_score = np.zeros_like(closes, dtype=np.float32)
-    stock_news_negative_score = np.zeros_like(closes, dtype=np.float32)
-    nxt_change_rate = np.zeros_like(closes, dtype=np.float32)
-    nxt_intraday_return = np.zeros_like(closes, dtype=np.float32)
-    nxt_close_strength = np.full_like(closes, 50.0, dtype=np.float32)
-    nxt_trade_value_ratio = np.zeros_like(closes, dtype=np.float32)
-    nxt_trade_value_impulse = np.zeros_like(closes, dtype=np.float32)
-    nxt_available = np.zeros_like(closes, dtype=np.float32)
-    if news_index is not None and regime_cache is not None:
-        (
-            news_risk_on,
-            news_risk_off,
-            news_confidence,
-            news_sentiment,
-            news_intensity,
-        ) = build_market_news_features(rows, news_index, regime_cache)
-    if news_index is not None and stock_signal_cache is not None:
-        (
-            stock_news_score,
-            stock_news_sentiment,
-            stock_news_buzz,
-            stock_news_article_count,
-            stock_news_positive_score,
-            stock_news_negative_score,
-        ) = build_stock_news_features(rows, stock_name, news_index, stock_signal_cache)
-    if nxt_index is not None:
-        (
-            nxt_change_rate,
-            nxt_intraday_return,
-            nxt_close_strength,
-            nxt_trade_value_ratio,
-            nxt_trade_value_impulse,
-            nxt_available,
-        ) = build_nxt_features(rows, stock_market, stock_code, market_caps, avg_turnover_ratio_20, nxt_index)
-
-    feature_names = [
-        "returns_1d",
-        "returns_2d",
-        "returns_3d",
-        "returns_5d",
-        "intraday_range",
-        "open_close_gap",
-        "gap_from_prev_close",
-        "turnover_ratio",
-        "turnover_ratio_vs_avg20",
-        "volume_ratio",
-        "close_vs_ma5",
-        "close_vs_ma10",
-        "close_vs_ma20",
-        "close_vs_ma60",
-        "volatility_20",
-        "range_ratio",
-        "close_vs_high20",
-        "close_vs_low20",
-        "close_location",
-        "nxt_change_rate",
-        "nxt_intraday_return",
-        "nxt_close_strength",
-        "nxt_trade_value_ratio",
-        "nxt_trade_value_impulse",
-        "nxt_available",
-        "news_risk_on",
-        "news_risk_off",
-        "news_confidence",
-        "news_sentiment",
-        "news_intensity",
-        "stock_news_score",
-        "stock_news_sentiment",
-        "stock_news_buzz",
-        "stock_news_article_count",
-        "stock_news_positive_score",
-        "stock_news_negative_score",
+
+
+def compute_market_news_block(context):
+    panel = context["panel"]
+    values = np.zeros((len(MARKET_REGIME_FIELDS), *panel["fields"]["TDD_CLSPRC"].shape), dtype=np.float32)
+    news_index = context["news_index"]
+    regime_cache = context["regime_cache"]
+    if news_index is None or regime_cache is None:
+        return values
+    regime_table = context["regime_table"]
+    if regime_table is None:
+        regime_table = build_market_regime_table(panel_calendar(panel), news_index, regime_cache)
+    for row, trading_dates in enumerate(panel["trading_dates"]):
+        columns = build_market_news_features(trading_dates, news_index, regime_cache, regime_table)
+        values[:, row, : len(trading_dates)] = columns
+    return values
+
+
+def compute_stock_news_block(context):
+    panel = context["panel"]
+    values = np.zeros((len(STOCK_SIGNAL_FIELDS), *panel["fields"]["TDD_CLSPRC"].shape), dtype=np.float32)
+    values[STOCK_SIGNAL_FIELDS.index("score")] = 50.0
+    news_index = context["news_index"]
+    stock_signal_cache = context["stock_signal_cache"]
+    if news_index is None or stock_signal_cache is None:
+        return values
+    stock_news_table = context["stock_news_table"]
+    if stock_news_table is None:
+        stock_news_table = build_stock_news_table(
+            panel_calendar(panel),
+            news_index,
+            [normalize_stock_signal_key(stock_name) for stock_name in context["stock_names"]],
+        )
+    for row, trading_dates in enumerate(panel["trading_dates"]):
+        columns = build_stock_news_features(
+            trading_dates,
+            context["stock_names"][row],
+            news_index,
+            stock_signal_cache,
+            stock_news_table,
+        )
+        values[:, row, : len(trading_dates)] = columns
+    return values
+
+
+def compute_nxt_block(context, market_caps, avg_turnover_ratio_20):
+    panel = context["panel"]
+    values = np.zeros((6, *market_caps.shape), dtype=np.float32)
+    values[2] = 50.0
+    nxt_index = context["nxt_index"]
+    if nxt_index is None:
+        return values
+    for row, series in enumerate(context["series_list"]):
+        length = int(panel["lengths"][row])
+        values[:, row, :length] = build_nxt_features(
+            panel["trading_dates"][row],
+            series["MKT_NM"].upper(),
+            normalize_security_code(series["ISU_CD"]),
+            market_caps[row, :length],
+            avg_turnover_ratio_20[row, :length],
+            nxt_index,
+        )
+    return values
+
+
+def feature_node(name, group, inputs, window, compute):
+    return {"name": name, "group": group, "inputs": tuple(inputs), "window": window, "compute": compute}
+
+
+def field_node(name, field):
+    return feature_node(name, "price", (), 0, lambda context: context["panel"]["fields"][field])
+
+
+def block_column_node(name, group, block, column):
+    return feature_node(name, group, (block,), 0, lambda context, values: values[column])
+
+
+FEATURE_REGISTRY = {
+    node["name"]: node
+    for node in (
+        field_node("close", "TDD_CLSPRC"),
+        field_node("high", "TDD_HGPRC"),
+        field_node("low", "TDD_LWPRC"),
+        field_node("open", "TDD_OPNPRC"),
+        field_node("turnover", "ACC_TRDVAL"),
+        field_node("market_cap", "MKTCAP"),
+        field_node("volume", "ACC_TRDVOL"),
+        feature_node("prev_close", "price", ("close",), 1, compute_prev_close),
+        feature_node("avg_turnover_ratio_20", "price", ("turnover_ratio",), 19, lambda context, values: rolling_mean(values, 20)),
+        feature_node("avg_volume_20", "price", ("volume",), 19, lambda context, values: rolling_mean(values, 20)),
+        feature_node(
+            "avg_range_20",
+            "price",
+            ("intraday_range",),
+            19,
+            lambda context, values: np.maximum(rolling_mean(values, 20), 1e-3),
+        ),
+        feature_node("ma5", "price", ("close",), 4, lambda context, values: rolling_mean(values, 5)),
+        feature_node("ma10", "price", ("close",), 9, lambda context, values: rolling_mean(values, 10)),
+        feature_node("ma20", "price", ("close",), 19, lambda context, values: rolling_mean(values, 20)),
+        feature_node("ma60", "price", ("close",), 59, lambda context, values: rolling_mean(values, 60)),
+        feature_node("high_window_20", "price", ("high",), 19, lambda context, values: rolling_max(values, 20)),
+        feature_node("low_window_20", "price", ("low",), 19, lambda context, values: rolling_min(values, 20)),
+        feature_node("day_range", "price", ("high", "low"), 0, lambda context, highs, lows: np.maximum(highs - lows, 1e-3)),
+        feature_node("market_news_block", "market_news", (), 1, compute_market_news_block),
+        feature_node("stock_news_block", "stock_news", (), 1, compute_stock_news_block),
+        feature_node("nxt_block", "nxt", ("market_cap", "avg_turnover_ratio_20"), 0, compute_nxt_block),
+        feature_node("returns_1d", "price", ("close",), 1, lambda context, closes: lagged_returns(closes, 1)),
+        feature_node("returns_2d", "price", ("close",), 2, lambda context, closes: lagged_returns(closes, 2)),
+        feature_node("returns_3d", "price", ("close",), 3, lambda context, closes: lagged_returns(closes, 3)),
+        feature_node("returns_5d", "price", ("close",), 5, lambda context, closes: lagged_returns(closes, 5)),
+        feature_node("intraday_range", "price", ("high", "low", "close"), 0, compute_intraday_range),
+        feature_node("open_close_gap", "price", ("close", "open"), 0, lambda context, closes, opens: gap_pct(closes, opens)),
+        feature_node(
+            "gap_from_prev_close",
+            "price",
+            ("open", "prev_close"),
+            0,
+            lambda context, opens, prev_closes: gap_pct(opens, prev_closes),
+        ),
+        feature_node("turnover_ratio", "price", ("turnover", "market_cap"), 0, compute_turnover_ratio),
+        feature_node(
+            "turnover_ratio_vs_avg20",
+            "price",
+            ("turnover_ratio", "avg_turnover_ratio_20"),
+            0,
+            lambda context, values, average: ratio_to_average(values, average, 1e-3, average > 0),
+        ),
+        feature_node(
+            "volume_ratio",
+            "price",
+            ("volume", "avg_volume_20"),
+            0,
+            lambda context, values, average: ratio_to_average(values, average, 1.0, values > 0),
+        ),
+        feature_node("close_vs_ma5", "price", ("close", "ma5"), 0, lambda context, closes, average: gap_pct(closes, average)),
+        feature_node("close_vs_ma10", "price", ("close", "ma10"), 0, lambda context, closes, average: gap_pct(closes, average)),
+        feature_node("close_vs_ma20", "price", ("close", "ma20"), 0, lambda context, closes, average: gap_pct(closes, average)),
+        feature_node("close_vs_ma60", "price", ("close", "ma60"), 0, lambda context, closes, average: gap_pct(closes, average)),
+        feature_node("volatility_20", "price", ("returns_1d",), 19, lambda context, values: rolling_std(values, 20)),
+        feature_node(
+            "range_ratio",
+            "price",
+            ("intraday_range", "avg_range_20"),
+            0,
+            lambda context, values, average: ratio_to_average(values, average, 0.0, average > 0),
+        ),
+        feature_node(
+            "close_vs_high20",
+            "price",
+            ("close", "high_window_20"),
+            0,
+            lambda context, closes, window: gap_pct(closes, window),
+        ),
+        feature_node(
+            "close_vs_low20",
+            "price",
+            ("close", "low_window_20"),
+            0,
+            lambda context, closes, window: gap_pct(closes, window),
+        ),
+        feature_node("close_location", "price", ("close", "low", "day_range"), 0, compute_close_location),
+        block_column_node("nxt_change_rate", "nxt", "nxt_block", 0),
+        block_column_node("nxt_intraday_return", "nxt", "nxt_block", 1),
+        block_column_node("nxt_close_strength", "nxt", "nxt_block", 2),
+        block_column_node("nxt_trade_value_ratio", "nxt", "nxt_block", 3),
+        block_column_node("nxt_trade_value_impulse", "nxt", "nxt_block", 4),
+        block_column_node("nxt_available", "nxt", "nxt_block", 5),
+        block_column_node("news_risk_on", "market_news", "market_news_block", 0),
+        block_column_node("news_risk_off", "market_news", "market_news_block", 1),
+        block_column_node("news_confidence", "market_news", "market_news_block", 2),
+        block_column_node("news_sentiment", "market_news", "market_news_block", 3),
+        block_column_node("news_intensity", "market_news", "market_news_block", 4),
+        block_column_node("stock_news_score", "stock_news", "stock_news_block", 0),
+        block_column_node("stock_news_sentiment", "stock_news", "stock_news_block", 1),
+        block_column_node("stock_news_buzz", "stock_news", "stock_news_block", 2),
+        block_column_node("stock_news_article_count", "stock_news", "stock_news_block", 3),
+        block_column_node("stock_news_positive_score", "stock_news", "stock_news_block", 4),
+        block_column_node("stock_news_negative_score", "stock_news", "stock_news_block", 5),
+    )
+}
+
+
+def resolve_feature_names(model_version=DEFAULT_MODEL_VERSION, excluded_groups=()):
+    return [
+        name
+        for name in MODEL_FEATURE_SETS[model_version]
+        if FEATURE_REGISTRY[name]["group"] not in set(excluded_groups)
     ]
-    features = np.column_stack(
-        [
-            returns_1d,
-            returns_2d,
-            returns_3d,
-            returns_5d,
-            intraday_range,
-            open_close_gap,
-            gap_from_prev_close,
-            turnover_ratio,
-            turnover_ratio_vs_avg20,
-            volume_ratio,
-            close_vs_ma5,
-            close_vs_ma10,
-            close_vs_ma20,
-            close_vs_ma60,
-            volatility_20,
-            range_ratio,
-            close_vs_high20,
-            close_vs_low20,
-            close_location,
-            nxt_change_rate,
-            nxt_intraday_return,
-            nxt_close_strength,
-            nxt_trade_value_ratio,
-            nxt_trade_value_impulse,
-            nxt_available,
-            news_risk_on,
-            news_risk_off,
-            news_confidence,
-            news_sentiment,
-            news_intensity,
-            stock_news_score,
-            stock_news_sentiment,
-            stock_news_buzz,
-            stock_news_article_count,
-            stock_news_positive_score,
-            stock_news_negative_score,
-        ]
-    ).astype(np.float32)
-    return closes, features, feature_names
+
+
+def feature_dependencies(feature_names):
+    ordered = []
+    pending = list(feature_names)
+    while pending:
+        name = pending.pop()
+        if name in ordered:
+            continue
+        ordered.append(name)
+        pending.extend(FEATURE_REGISTRY[name]["inputs"])
+    return sorted(ordered)
+
+
+def feature_context_rows(feature_names):
+    def requirement(name):
+        node = FEATURE_REGISTRY[name]
+        return node["window"] + max((requirement(input_name) for input_name in node["inputs"]), default=0)
+
+    return max((requirement(name) for name in feature_names), default=0)
+
+
+def feature_groups_used(feature_names):
+    return {FEATURE_REGISTRY[name]["group"] for name in feature_dependencies(feature_names)}
+
+
+def resolve_feature(name, context):
+    values = context["values"]
+    if name not in values:
+        node = FEATURE_REGISTRY[name]
+        inputs = [resolve_feature(input_name, context) for input_name in node["inputs"]]
+        started = perf_counter()
+        values[name] = node["compute"](context, *inputs)
+        context["costs"][name] = context["costs"].get(name, 0.0) + perf_counter() - started
+    return values[name]
+
+
+def panel_calendar(panel):
+    return [trading_date for trading_dates in panel["trading_dates"] for trading_date in trading_dates]
+
+
+def build_feature_tensor(
+    series_list,
+    stock_names=None,
+    news_index=None,
+    regime_cache=None,
+    stock_signal_cache=None,
+    nxt_index=None,
+    regime_table=None,
+    stock_news_table=None,
+    feature_names=None,
+    feature_costs=None,
+):
+    feature_names = list(feature_names or FEATURE_NAMES)
+    panel = pack_series_panel(series_list)
+    context = {
+        "panel": panel,
+        "series_list": series_list,
+        "stock_names": stock_names or [series["ISU_NM"] for series in series_list],
+        "news_index": news_index,
+        "regime_cache": regime_cache,
+        "stock_signal_cache": stock_signal_cache,
+        "nxt_index": nxt_index,
+        "regime_table": regime_table,
+        "stock_news_table": stock_news_table,
+        "values": {},
+        "costs": feature_costs if feature_costs is not None else {},
+    }
+    features = np.zeros((*panel["fields"]["TDD_CLSPRC"].shape, len(feature_names)), dtype=np.float32)
+    for column, name in enumerate(feature_names):
+        features[..., column] = resolve_feature(name, context)
+    return {
+        "feature_names": feature_names,
+        "lengths": panel["lengths"],
+        "closes": panel["fields"]["TDD_CLSPRC"],
+        "features": features,
+    }
+
+
+def slice_feature_tensor(tensor, row):
+    length = int(tensor["lengths"][row])
+    return tensor["closes"][row, :length], tensor["features"][row, :length], tensor["feature_names"]
+
+
+def build_feature_matrix(
+    series,
+    stock_name="",
+    news_index=None,
+    regime_cache=None,
+    stock_signal_cache=None,
+    nxt_index=None,
+    feature_names=None,
+):
+    tensor = build_feature_tensor(
+        [series],
+        stock_names=[stock_name],
+        news_index=news_index,
+        regime_cache=regime_cache,
+        stock_signal_cache=stock_signal_cache,
+        nxt_index=nxt_index,
+        feature_names=feature_names,
+    )
+    return slice_feature_tensor(tensor, 0)
+
+
+def feature_schema_hash(feature_names=FEATURE_NAMES):
+    schema = {
+        "version": FEATURE_STORE_VERSION,
+        "feature_names": list(feature_names),
+        "market_keywords": MARKET_REGIME_KEYWORDS,
+        "stock_keywords": STOCK_NEWS_KEYWORDS,
+        "windows": {name: FEATURE_REGISTRY[name]["window"] for name in feature_dependencies(feature_names)},
+    }
+    payload = json.dumps(schema, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def feature_store_path(path, cache_dir, feature_names=FEATURE_NAMES):
+    return Path(cache_dir) / "features" / feature_schema_hash(feature_names) / f"{path.parent.name}_{path.stem}.npz"
+
+
+def feature_input_digest(series, length):
+    digest = hashlib.sha1(series["BAS_DD"][:length].tobytes())
+    for field in KRX_NUMERIC_FIELDS:
+        digest.update(np.ascontiguousarray(series[field][:length]).tobytes())
+    return digest.hexdigest()
+
+
+def nxt_index_stamps(nxt_index):
+    days = (nxt_index or {}).get("days", {})
+    return {trading_date: (int(day["size"]), int(day["mtime_ns"])) for trading_date, day in days.items()}
+
+
+def read_feature_store(store_path, feature_names=FEATURE_NAMES):
+    ensure_numpy()
+    try:
+        with np.load(store_path, allow_pickle=False) as stored:
+            if (
+                int(stored["version"]) != FEATURE_STORE_VERSION
+                or str(stored["schema"]) != feature_schema_hash(feature_names)
+            ):
+                return None
+            entry = {name: stored[name] for name in stored.files}
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    for name in ("stock_name", "market", "code", "input_digest", "news_generation"):
+        entry[name] = str(entry[name])
+    entry["news_revision"] = int(entry["news_revision"])
+    entry["feature_names"] = [str(name) for name in entry["feature_names"]]
+    entry["nxt_stamps"] = {
+        str(trading_date): (int(size), int(mtime_ns))
+        for trading_date, size, mtime_ns in zip(entry["nxt_dates"], entry["nxt_sizes"], entry["nxt_mtimes"])
+    }
+    return entry
+
+
+def write_feature_store(store_path, entry):
+    tmp_path = store_path.with_name(f"{store_path.name}.tmp")
+    nxt_dates = sorted(entry["nxt_stamps"])
+    try:
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.array(FEATURE_STORE_VERSION),
+                schema=np.array(feature_schema_hash(entry["feature_names"])),
+                feature_names=np.array(entry["feature_names"]),
+                stock_name=np.array(entry["stock_name"]),
+                market=np.array(entry["market"]),
+                code=np.array(entry["code"]),
+                input_digest=np.array(entry["input_digest"]),
+                news_generation=np.array(entry["news_generation"]),
+                news_revision=np.array(entry["news_revision"]),
+                nxt_dates=np.array(nxt_dates, dtype=np.str_),
+                nxt_sizes=np.array([entry["nxt_stamps"][day][0] for day in nxt_dates], dtype=np.int64),
+                nxt_mtimes=np.array([entry["nxt_stamps"][day][1] for day in nxt_dates], dtype=np.int64),
+                dates=entry["dates"],
+                closes=entry["closes"],
+                features=entry["features"],
+            )
+        os.replace(tmp_path, store_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_feature_store(cache_dir, pattern="*", feature_names=FEATURE_NAMES):
+    stores = {}
+    store_dir = Path(cache_dir) / "features" / feature_schema_hash(feature_names)
+    for store_path in sorted(store_dir.glob(f"{pattern}.npz")):
+        entry = read_feature_store(store_path, feature_names)
+        if entry is not None:
+            stores[store_path.stem] = entry
+    return stores
+
+
+def feature_store_start(entry, series, stock_name, news_index, nxt_stamps):
+    if entry is None:
+        return 0
+    length = len(entry["dates"])
+    if (
+        length > len(series["BAS_DD"])
+        or entry["stock_name"] != stock_name
+        or entry["market"] != series["MKT_NM"].upper()
+        or entry["code"] != normalize_security_code(series["ISU_CD"])
+        or entry["input_digest"] != feature_input_digest(series, length)
+    ):
+        return 0
+
+    revision = (news_index or empty_news_index()).get("revision", {"generation": "", "changes": []})
+    if entry["news_generation"] != revision["generation"] or entry["news_revision"] > len(revision["changes"]):
+        return 0
+    stale_dates = [day for day in revision["changes"][entry["news_revision"] :] if day]
+    stored_stamps = entry["nxt_stamps"]
+    stale_dates.extend(day for day in set(stored_stamps) | set(nxt_stamps) if stored_stamps.get(day) != nxt_stamps.get(day))
+    if stale_dates:
+        length = min(length, int(np.searchsorted(series["BAS_DD"], min(stale_dates))))
+    return length
+
+
+def slice_series(series, start):
+    if start <= 0:
+        return series
+    sliced = {field: series[field][start:] for field in ("BAS_DD", *KRX_NUMERIC_FIELDS)}
+    sliced.update({field: series[field] for field in KRX_IDENTITY_FIELDS})
+    return sliced
+
+
+def stock_feature_batch_entry(path, series, entry, start, contexts, tensors, feature_names, cache_dir, revision, nxt_stamps):
+    if path not in contexts:
+        return entry["closes"], entry["features"], list(feature_names)
+    tensor, row = tensors[path]
+    _, computed, _ = slice_feature_tensor(tensor, row)
+    features = computed[start - contexts[path] :]
+    if start > 0:
+        features = np.concatenate([entry["features"][:start], features])
+    closes = series["TDD_CLSPRC"].astype(np.float32)
+    if cache_dir is not None:
+        write_feature_store(
+            feature_store_path(path, cache_dir, feature_names),
+            {
+                "feature_names": feature_names,
+                "stock_name": series["ISU_NM"],
+                "market": series["MKT_NM"].upper(),
+                "code": normalize_security_code(series["ISU_CD"]),
+                "input_digest": feature_input_digest(series, len(series["BAS_DD"])),
+                "news_generation": revision["generation"],
+                "news_revision": len(revision["changes"]),
+                "nxt_stamps": nxt_stamps,
+                "dates": series["BAS_DD"],
+                "closes": closes,
+                "features": features,
+            },
+        )
+    return closes, features, list(feature_names)
+
+
+def stock_batch_features(stock_features, path):
+    features = stock_features[path]
+    if isinstance(features, Exception):
+        raise features
+    return features
+
+
+def iter_feature_batches(
+    paths,
+    loaded_series,
+    news_index=None,
+    regime_cache=None,
+    stock_signal_cache=None,
+    nxt_index=None,
+    cache_dir=None,
+    regime_table=None,
+    stock_news_table=None,
+    feature_names=None,
+    feature_costs=None,
+):
+    feature_names = list(feature_names or FEATURE_NAMES)
+    context_rows = feature_context_rows(feature_names)
+    nxt_stamps = nxt_index_stamps(nxt_index)
+    revision = (news_index or empty_news_index()).get("revision", {"generation": "", "changes": []})
+    tensor_options = {
+        "news_index": news_index,
+        "regime_cache": regime_cache,
+        "stock_signal_cache": stock_signal_cache,
+        "nxt_index": nxt_index,
+        "regime_table": regime_table,
+        "stock_news_table": stock_news_table,
+        "feature_names": feature_names,
+        "feature_costs": feature_costs,
+    }
+    for offset in range(0, len(paths), FEATURE_BATCH_SIZE):
+        batch_paths = paths[offset : offset + FEATURE_BATCH_SIZE]
+        failures = {}
+        entries = {}
+        starts = {}
+        for path in batch_paths:
+            try:
+                series = loaded_series[path]
+                entries[path] = None
+                if cache_dir is not None:
+                    entries[path] = read_feature_store(feature_store_path(path, cache_dir, feature_names), feature_names)
+                starts[path] = feature_store_start(entries[path], series, series["ISU_NM"], news_index, nxt_stamps)
+            except Exception as exc:  # noqa: BLE001
+                failures[path] = exc
+
+        pending = [path for path in starts if starts[path] < len(loaded_series[path]["BAS_DD"])]
+        contexts = {path: max(starts[path] - context_rows, 0) for path in pending}
+        tensors = {}
+        if pending:
+            try:
+                tensor = build_feature_tensor(
+                    [slice_series(loaded_series[path], contexts[path]) for path in pending], **tensor_options
+                )
+                tensors = {path: (tensor, row) for row, path in enumerate(pending)}
+            except Exception:  # noqa: BLE001
+                for path in pending:
+                    try:
+                        tensor = build_feature_tensor([slice_series(loaded_series[path], contexts[path])], **tensor_options)
+                        tensors[path] = (tensor, 0)
+                    except Exception as exc:  # noqa: BLE001
+                        failures[path] = exc
+
+        batch = {}
+        for path in batch_paths:
+            if path in failures:
+                batch[path] = failures[path]
+                continue
+            try:
+                batch[path] = stock_feature_batch_entry(
+                    path,
+                    loaded_series[path],
+                    entries[path],
+                    starts[path],
+                    contexts,
+                    tensors,
+                    feature_names,
+                    cache_dir,
+                    revision,
+                    nxt_stamps,
+                )
+            except Exception as exc:  # noqa: BLE001
+                batch[path] = exc
+        yield batch
+
+
+def sample_base_rows(closes, lookback, max_horizon):
+    sample_count = max(len(closes) - max_horizon + 1 - lookback, 0)
+    base_idx = np.arange(lookback - 1, lookback - 1 + sample_count)
+    return base_idx[np.asarray(closes)[base_idx] > 0]
 
 
 def build_dataset(features, closes, lookback, horizon_1d, horizon_5d, horizon_20d):
     max_horizon = max(horizon_1d, horizon_5d, horizon_20d)
-    samples = []
-    target_returns = []
-    target_up = []
-
-    for end_idx in range(lookback, len(features) - max_horizon + 1):
-        base_idx = end_idx - 1
-        base_close = closes[base_idx]
-        if base_close <= 0:
-            continue
-        ret_1d = pct_change(closes[base_idx + horizon_1d], base_close)
-        ret_5d = pct_change(closes[base_idx + horizon_5d], base_close)
-        ret_20d = pct_change(closes[base_idx + horizon_20d], base_close)
-        samples.append(features[end_idx - lookback : end_idx])
-        target_returns.append([ret_1d, ret_5d, ret_20d])
-        target_up.append([1.0 if ret_1d > 0 else 0.0])
-
-    if not samples:
+    features = np.asarray(features, dtype=np.float32)
+    closes = np.asarray(closes, dtype=np.float32)
+    base_idx = sample_base_rows(closes, lookback, max_horizon)
+    if not len(base_idx):
         return None, None, None
 
-    return (
-        np.array(samples, dtype=np.float32),
-        np.array(target_returns, dtype=np.float32),
-        np.array(target_up, dtype=np.float32),
-    )
+    windows = np.lib.stride_tricks.sliding_window_view(features, lookback, axis=0).transpose(0, 2, 1)
+    if base_idx[-1] - base_idx[0] + 1 == len(base_idx):
+        x_data = windows[base_idx[0] - (lookback - 1) : base_idx[-1] - (lookback - 2)]
+    else:
+        x_data = windows[base_idx - (lookback - 1)]
 
+    target_returns, target_up = sample_targets(closes, base_idx, (horizon_1d, horizon_5d, horizon_20d))
+    return x_data, target_returns, target_up
 
-def normalize_splits(x_train, x_val, x_latest):
+
+def sample_targets(closes, base_idx, horizons):
+    base_close = closes[base_idx]
+    target_returns = np.stack(
+        [((closes[base_idx + horizon] / base_close).astype(np.float64) - 1.0) * 100.0 for horizon in horizons],
+        axis=1,
+    ).astype(np.float32)
+    target_up = (target_returns[:, :1] > 0).astype(np.float32)
+    return target_returns, target_up
+
+
+def normalization_stats(x_train):
     mean = x_train.mean(axis=(0, 1), keepdims=True)
     std = x_train.std(axis=(0, 1), keepdims=True)
     std[std < 1e-6] = 1.0
-    return (x_train - mean) / std, (x_val - mean) / std, (x_latest - mean) / std
+    return mean, std
+
+
+POOLED_EMBEDDING_DIM = 8
+TRAINING_WORKER_MEMORY_BYTES = 1_500_000_000
+MODEL_ARTIFACT_VERSION = 2
+PREDICT_STACK_SIZE = 256
+LSTM_LOSS_WEIGHTS = {"returns": 1.0, "prob_up": 0.4}
+MODEL_TEMPLATES = {}
 
 
 def create_model(lookback, feature_count):
@@ -1058,33 +2124,67 @@ def create_model(lookback, feature_count):
     probability_output = layers.Dense(1, activation="sigmoid", name="prob_up")(x)
 
     model = keras.Model(inputs=inputs, outputs={"returns": returns_output, "prob_up": probability_output})
+    return compile_lstm_model(model)
+
+
+def compile_lstm_model(model):
     model.compile(
         optimizer=keras.optimizers.Adam(learning_rate=1e-3),
         loss={
             "returns": keras.losses.Huber(),
             "prob_up": "binary_crossentropy",
         },
-        loss_weights={
-            "returns": 1.0,
-            "prob_up": 0.4,
-        },
+        loss_weights=LSTM_LOSS_WEIGHTS,
     )
     return model
 
 
-def calibrate_probabilities(y_true_up, val_prob_raw, latest_prob_raw):
+def create_pooled_model(lookback, feature_count, symbol_count):
+    inputs = keras.Input(shape=(lookback, feature_count), name="price_features")
+    symbol_input = keras.Input(shape=(), dtype="int32", name="symbol_id")
+    x = layers.LSTM(32, return_sequences=True)(inputs)
+    x = layers.Dropout(0.25)(x)
+    x = layers.LSTM(16)(x)
+    symbol_embedding = layers.Embedding(symbol_count, POOLED_EMBEDDING_DIM, name="symbol_embedding")(symbol_input)
+    x = layers.Concatenate()([x, symbol_embedding])
+    x = layers.Dense(24, activation="relu")(x)
+    x = layers.Dropout(0.15)(x)
+
+    returns_output = layers.Dense(3, name="returns")(x)
+    probability_output = layers.Dense(1, activation="sigmoid", name="prob_up")(x)
+
+    model = keras.Model(
+        inputs={"price_features": inputs, "symbol_id": symbol_input},
+        outputs={"returns": returns_output, "prob_up": probability_output},
+    )
+    return compile_lstm_model(model)
+
+
+def fit_probability_calibrator(y_true_up, val_prob_raw):
+    y_true = y_true_up[:, 0].astype(np.float32)
+    raw_probs = np.clip(val_prob_raw[:, 0].astype(np.float32), 0.0, 1.0)
+    if len(y_true) < 24 or len(np.unique(y_true)) < 2:
+        return None
+
+    calibrator = IsotonicRegression(out_of_bounds="clip")
+    calibrator.fit(raw_probs, y_true)
+    return {
+        "x": np.asarray(calibrator.X_thresholds_, dtype=np.float64),
+        "y": np.asarray(calibrator.y_thresholds_, dtype=np.float64),
+    }
+
+
+def calibrate_probabilities(y_true_up, val_prob_raw, latest_prob_raw, calibrator):
     y_true = y_true_up[:, 0].astype(np.float32)
     raw_probs = np.clip(val_prob_raw[:, 0].astype(np.float32), 0.0, 1.0)
     latest_raw = float(np.clip(latest_prob_raw[0][0], 0.0, 1.0))
 
-    if len(y_true) < 24 or len(np.unique(y_true)) < 2:
+    if calibrator is None:
         brier = float(brier_score_loss(y_true, raw_probs)) if len(y_true) > 0 else 0.25
         return raw_probs, latest_raw, brier
 
-    calibrator = IsotonicRegression(out_of_bounds="clip")
-    calibrator.fit(raw_probs, y_true)
-    calibrated_val = np.clip(calibrator.transform(raw_probs), 0.0, 1.0)
-    calibrated_latest = float(np.clip(calibrator.transform([latest_raw])[0], 0.0, 1.0))
+    calibrated_val = np.clip(np.interp(raw_probs, calibrator["x"], calibrator["y"]), 0.0, 1.0)
+    calibrated_latest = float(np.clip(np.interp(latest_raw, calibrator["x"], calibrator["y"]), 0.0, 1.0))
     brier = float(brier_score_loss(y_true, calibrated_val))
     return calibrated_val, calibrated_latest, brier
 
@@ -1131,25 +2231,347 @@ def split_dataset(x_data, y_returns, y_up):
     }
 
 
-def predict_for_stock(path, args, news_index=None, regime_cache=None, stock_signal_cache=None, nxt_index=None):
-    rows = read_krx_rows(path)
-    if not rows:
-        return None
+def load_krx_job(path, cache_dir, min_market_cap):
+    ensure_numpy()
+    latest = probe_krx_latest(path, cache_dir)
+    if latest is None or int(latest["MKTCAP"]) < min_market_cap:
+        return None
+
+    series = load_krx_series(path, cache_dir)
+    if not len(series["BAS_DD"]) or int(series["MKTCAP"][-1]) < min_market_cap:
+        return None
+    return series
+
+
+def load_krx_universe(paths, cache_dir=None, min_market_cap=0, workers=1):
+    loaded = {}
+    errors = {}
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        for path in paths:
+            try:
+                loaded[path] = load_krx_job(path, cache_dir, min_market_cap)
+            except Exception as exc:  # noqa: BLE001
+                errors[path] = exc
+        return loaded, errors
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(load_krx_job, path, cache_dir, min_market_cap): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                loaded[path] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                errors[path] = exc
+    return loaded, errors
+
+
+def available_memory_bytes():
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def auto_training_workers():
+    cpu_count = os.cpu_count() or 1
+    memory = available_memory_bytes()
+    if memory is None:
+        return cpu_count
+    return max(1, min(cpu_count, memory // TRAINING_WORKER_MEMORY_BYTES))
+
+
+def init_training_worker(threads, seed):
+    ensure_dependencies()
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+    atexit.register(release_model_templates)
+
+
+def split_feature_failures(stock_features, outcomes):
+    ready = {}
+    for path, features in stock_features.items():
+        if isinstance(features, Exception):
+            outcomes[path] = features
+        else:
+            ready[path] = features
+    return ready
+
+
+def stock_chunks(stock_features, stack_size):
+    paths = sorted(stock_features, key=lambda path: len(stock_features[path][0]))
+    return [paths[offset : offset + stack_size] for offset in range(0, len(paths), stack_size)]
+
+
+def stock_group_args(chunk, loaded_series, stock_features):
+    return [loaded_series[path] for path in chunk], [stock_features[path] for path in chunk]
+
+
+def train_chunks_in_pool(executor, chunks, loaded_series, stock_features, args, outcomes):
+    futures = {}
+    unsubmitted = []
+    for position, chunk in enumerate(chunks):
+        try:
+            future = executor.submit(
+                predict_for_stock_group,
+                chunk,
+                args,
+                *stock_group_args(chunk, loaded_series, stock_features),
+            )
+        except BrokenProcessPool:
+            unsubmitted = chunks[position:]
+            break
+        futures[future] = chunk
+    broken = bool(unsubmitted)
+    for future in as_completed(futures):
+        try:
+            outcomes.update(future.result())
+        except BrokenProcessPool as exc:
+            broken = True
+            outcomes.update({path: exc for path in futures[future]})
+        except Exception as exc:  # noqa: BLE001
+            outcomes.update({path: exc for path in futures[future]})
+    return broken, unsubmitted
+
+
+def train_stock_batches(feature_batches, loaded_series, args):
+    outcomes = {}
+    executor = None
+    if args.workers > 1:
+        threads = max(1, (os.cpu_count() or 1) // args.workers)
+        print(
+            f"Training per-stock models with {args.workers} workers "
+            f"({threads} threads each, stacks of {args.stack_size})"
+        )
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_training_worker,
+            initargs=(threads, args.seed),
+        )
+    else:
+        print(f"Training per-stock models in stacks of {args.stack_size}")
+    try:
+        for stock_features in feature_batches:
+            stock_features = split_feature_failures(stock_features, outcomes)
+            chunks = stock_chunks(stock_features, args.stack_size)
+            if executor is not None:
+                broken, chunks = train_chunks_in_pool(executor, chunks, loaded_series, stock_features, args, outcomes)
+                if broken:
+                    print("  training pool broke; training the remaining stocks in-process")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = None
+            for chunk in chunks:
+                series_list, features_list = stock_group_args(chunk, loaded_series, stock_features)
+                outcomes.update(predict_for_stock_group(chunk, args, series_list, features_list))
+            print(f"  trained {len(outcomes)} stocks")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return outcomes
+
+
+def model_signature(feature_names, args):
+    signature = {
+        "model_version": DEFAULT_MODEL_VERSION,
+        "feature_schema": feature_schema_hash(feature_names),
+        "lookback": args.lookback,
+        "horizons": [args.horizon_1d, args.horizon_5d, args.horizon_20d],
+    }
+    payload = json.dumps(signature, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def model_weights_path(path, cache_dir, feature_names, args):
+    return (
+        Path(cache_dir)
+        / "models"
+        / model_signature(feature_names, args)
+        / f"{path.parent.name}_{path.stem}.weights.h5"
+    )
+
+
+def load_model_weights(model, weights_path):
+    if not weights_path.exists():
+        return False
+    try:
+        model.load_weights(weights_path)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def save_model_weights(model, weights_path):
+    tmp_path = weights_path.with_name(weights_path.name.replace(".weights.h5", ".tmp.weights.h5"))
+    try:
+        weights_path.parent.mkdir(parents=True, exist_ok=True)
+        model.save_weights(tmp_path)
+        os.replace(tmp_path, weights_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def model_artifact_path(weights_path):
+    return weights_path.with_name(weights_path.name.replace(".weights.h5", ".artifact.npz"))
+
+
+def training_data_digest(features, closes, splits, lookback, max_horizon, signature):
+    sample_count = len(splits["x_train"]) + len(splits["x_val"])
+    base_idx = sample_base_rows(np.asarray(closes, dtype=np.float32), lookback, max_horizon)[:sample_count]
+    digest = hashlib.sha1(signature.encode("utf-8"))
+    digest.update(base_idx.astype(np.int64).tobytes())
+    rows = np.asarray(features, dtype=np.float32)[base_idx[0] - (lookback - 1) : base_idx[-1] + 1]
+    digest.update(np.ascontiguousarray(rows).tobytes())
+    for key in ("y_train_returns", "y_train_up", "y_val_returns", "y_val_up"):
+        digest.update(np.ascontiguousarray(splits[key], dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def load_model_artifact(artifact_path, data_digest=None):
+    if not artifact_path.exists():
+        return None
+    try:
+        with np.load(artifact_path, allow_pickle=False) as stored:
+            if int(stored["version"]) != MODEL_ARTIFACT_VERSION or (
+                data_digest is not None and str(stored["data_digest"]) != data_digest
+            ):
+                return None
+            calibrator = None
+            if len(stored["calibrator_x"]):
+                calibrator = {"x": stored["calibrator_x"], "y": stored["calibrator_y"]}
+            return {
+                "mean": stored["mean"],
+                "std": stored["std"],
+                "val_returns": stored["val_returns"],
+                "val_prob_raw": stored["val_prob_raw"],
+                "calibrator": calibrator,
+                "validation": {
+                    "y_val_up": stored["y_val_up"],
+                    "y_val_returns": stored["y_val_returns"],
+                    "train_samples": int(stored["train_samples"]),
+                },
+            }
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def save_model_artifact(artifact_path, data_digest, artifact):
+    tmp_path = artifact_path.with_name(f"{artifact_path.name}.tmp")
+    calibrator = artifact["calibrator"] or {"x": np.empty(0), "y": np.empty(0)}
+    try:
+        artifact_path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.array(MODEL_ARTIFACT_VERSION),
+                data_digest=np.array(data_digest),
+                mean=artifact["mean"],
+                std=artifact["std"],
+                val_returns=artifact["val_returns"],
+                val_prob_raw=artifact["val_prob_raw"],
+                calibrator_x=calibrator["x"],
+                calibrator_y=calibrator["y"],
+                y_val_up=artifact["validation"]["y_val_up"],
+                y_val_returns=artifact["validation"]["y_val_returns"],
+                train_samples=np.array(artifact["validation"]["train_samples"]),
+            )
+        os.replace(tmp_path, artifact_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+def predict_for_stock(
+    path,
+    args,
+    series=None,
+    news_index=None,
+    regime_cache=None,
+    stock_signal_cache=None,
+    nxt_index=None,
+    features=None,
+):
+    if series is None:
+        series = load_krx_job(path, args.cache_dir, args.min_market_cap)
+        if series is None:
+            return None
+
+    stock_name = series["ISU_NM"]
+    if features is None:
+        features = build_feature_matrix(
+            series,
+            stock_name=stock_name,
+            news_index=news_index,
+            regime_cache=regime_cache,
+            stock_signal_cache=stock_signal_cache,
+            nxt_index=nxt_index,
+        )
+    job = prepare_stock_job(path, args, series, features)
+    if job is None:
+        return None
+
+    template, reuse = build_stock_model(job, args)
+    if reuse:
+        return predict_from_artifact(template, job)
+    job["mean"], job["std"] = normalization_stats(job["splits"]["x_train"])
+    fit_stock_model(template["model"], job, args)
+    return finish_stock_job(template, job)
+
+
+def model_template(lookback, feature_count):
+    key = (lookback, feature_count)
+    if key not in MODEL_TEMPLATES:
+        model = create_model(lookback, feature_count)
+        model.optimizer.build(model.trainable_variables)
+        MODEL_TEMPLATES[key] = {
+            "model": model,
+            "optimizer_state": [variable.numpy() for variable in model.optimizer.variables],
+            "predict": tf.function(
+                lambda x: model(x, training=False),
+                input_signature=[tf.TensorSpec((None, lookback, feature_count), tf.float32)],
+            ),
+        }
+    return MODEL_TEMPLATES[key]
+
 
-    latest = rows[-1]
-    latest_market_cap = parse_int(latest.get("MKTCAP", "0"))
-    if latest_market_cap < args.min_market_cap:
-        return None
+def release_model_templates():
+    MODEL_TEMPLATES.clear()
+    tf.keras.backend.clear_session()
 
-    stock_name = clean_cell(latest.get("ISU_NM", ""))
-    closes, features, feature_names = build_feature_matrix(
-        rows,
-        stock_name=stock_name,
-        news_index=news_index,
-        regime_cache=regime_cache,
-        stock_signal_cache=stock_signal_cache,
-        nxt_index=nxt_index,
-    )
+
+def fresh_initializer(initializer):
+    config = initializer.get_config()
+    if "seed" in config:
+        config["seed"] = None
+    return initializer.__class__.from_config(config)
+
+
+def reset_model_state(template):
+    model = template["model"]
+    for layer in model.layers:
+        cell = getattr(layer, "cell", layer)
+        for variable in layer.weights:
+            shape = tuple(variable.shape)
+            if variable.name == "recurrent_kernel":
+                value = fresh_initializer(cell.recurrent_initializer)(shape)
+            elif variable.name == "kernel":
+                value = fresh_initializer(cell.kernel_initializer)(shape)
+            elif getattr(cell, "unit_forget_bias", False):
+                units = shape[0] // 4
+                value = np.concatenate([np.zeros(units), np.ones(units), np.zeros(2 * units)])
+            else:
+                value = fresh_initializer(cell.bias_initializer)(shape)
+            variable.assign(value)
+    for variable, value in zip(model.optimizer.variables, template["optimizer_state"]):
+        variable.assign(value)
+
+
+def prepare_stock_job(path, args, series, features):
+    closes, features, feature_names = features
     x_data, y_returns, y_up = build_dataset(
         features,
         closes,
@@ -1168,15 +2590,72 @@ def predict_for_stock(path, args, news_index=None, regime_cache=None, stock_sign
     x_latest = features[-args.lookback :]
     if len(x_latest) < args.lookback:
         return None
-    x_latest = np.array([x_latest], dtype=np.float32)
 
-    feature_count = x_data.shape[2]
-    x_train, x_val, x_latest = normalize_splits(
-        splits["x_train"], splits["x_val"], x_latest
+    job = {
+        "path": path,
+        "series": series,
+        "closes": closes,
+        "features": features,
+        "feature_names": feature_names,
+        "splits": splits,
+        "x_latest": np.array([x_latest], dtype=np.float32),
+        "epochs": args.epochs,
+        "data_digest": training_data_digest(
+            features,
+            closes,
+            splits,
+            args.lookback,
+            max(args.horizon_1d, args.horizon_5d, args.horizon_20d),
+            model_signature(feature_names, args),
+        ),
+        "weights_path": None,
+        "artifact_path": None,
+        "artifact": None,
+    }
+    if args.cache_dir is not None:
+        job["weights_path"] = model_weights_path(path, args.cache_dir, feature_names, args)
+        job["artifact_path"] = model_artifact_path(job["weights_path"])
+        job["artifact"] = load_model_artifact(job["artifact_path"], job["data_digest"])
+    return job
+
+
+def build_stock_model(job, args):
+    template = model_template(args.lookback, job["splits"]["x_train"].shape[2])
+    reset_model_state(template)
+    loaded = (
+        job["weights_path"] is not None
+        and (job["artifact"] is not None or args.warm_start_epochs > 0)
+        and load_model_weights(template["model"], job["weights_path"])
+    )
+    if loaded and job["artifact"] is not None:
+        return template, True
+    if loaded:
+        job["epochs"] = min(args.epochs, args.warm_start_epochs)
+    return template, False
+
+
+def normalized_input(values, mean, std):
+    return np.asarray((values - mean) / std, dtype=np.float32)
+
+
+def predict_from_artifact(template, job):
+    artifact = job["artifact"]
+    latest_prediction = template["predict"](normalized_input(job["x_latest"], artifact["mean"], artifact["std"]))
+    return build_prediction_item(
+        job["series"],
+        job["features"],
+        job["feature_names"],
+        artifact["validation"],
+        artifact["val_returns"],
+        artifact["val_prob_raw"],
+        latest_prediction["returns"].numpy(),
+        latest_prediction["prob_up"].numpy(),
+        artifact["calibrator"],
     )
 
-    tf.keras.backend.clear_session()
-    model = create_model(args.lookback, feature_count)
+
+def fit_stock_model(model, job, args):
+    splits = job["splits"]
     callbacks = [
         keras.callbacks.EarlyStopping(
             monitor="val_loss",
@@ -1187,47 +2666,289 @@ def predict_for_stock(path, args, news_index=None, regime_cache=None, stock_sign
     ]
 
     model.fit(
-        x_train,
+        (splits["x_train"] - job["mean"]) / job["std"],
         {
             "returns": splits["y_train_returns"],
             "prob_up": splits["y_train_up"],
         },
         validation_data=(
-            x_val,
+            (splits["x_val"] - job["mean"]) / job["std"],
             {
                 "returns": splits["y_val_returns"],
                 "prob_up": splits["y_val_up"],
             },
         ),
-        epochs=args.epochs,
+        epochs=job["epochs"],
         batch_size=args.batch_size,
         shuffle=False,
         verbose=0,
         callbacks=callbacks,
     )
 
-    val_predictions = model(x_val, training=False)
-    latest_prediction = model(x_latest, training=False)
 
-    val_returns = val_predictions["returns"].numpy()
-    latest_returns = latest_prediction["returns"].numpy()
-    val_prob_raw = val_predictions["prob_up"].numpy()
-    latest_prob_raw = latest_prediction["prob_up"].numpy()
+def finish_stock_job(template, job):
+    splits = job["splits"]
+    val_predictions = template["predict"](normalized_input(splits["x_val"], job["mean"], job["std"]))
+    latest_prediction = template["predict"](normalized_input(job["x_latest"], job["mean"], job["std"]))
+    artifact = {
+        "mean": job["mean"],
+        "std": job["std"],
+        "val_returns": val_predictions["returns"].numpy(),
+        "val_prob_raw": val_predictions["prob_up"].numpy(),
+        "validation": validation_targets(splits, len(splits["x_train"])),
+    }
+    artifact["calibrator"] = fit_probability_calibrator(splits["y_val_up"], artifact["val_prob_raw"])
+    result = build_prediction_item(
+        job["series"],
+        job["features"],
+        job["feature_names"],
+        artifact["validation"],
+        artifact["val_returns"],
+        artifact["val_prob_raw"],
+        latest_prediction["returns"].numpy(),
+        latest_prediction["prob_up"].numpy(),
+        artifact["calibrator"],
+    )
+    if job["weights_path"] is not None:
+        job["artifact_path"].unlink(missing_ok=True)
+        if save_model_weights(template["model"], job["weights_path"]):
+            save_model_artifact(job["artifact_path"], job["data_digest"], artifact)
+    return result
+
+
+def predict_for_stock_group(paths, args, series_list, features_list):
+    outcomes = {}
+    groups = {}
+    for path, series, features in zip(paths, series_list, features_list):
+        try:
+            job = prepare_stock_job(path, args, series, features)
+            if job is None:
+                outcomes[path] = None
+                continue
+            template, reuse = build_stock_model(job, args)
+            if reuse:
+                outcomes[path] = predict_from_artifact(template, job)
+                continue
+            job["mean"], job["std"] = normalization_stats(job["splits"]["x_train"])
+            job["weights"] = [variable.numpy() for variable in stacked_model_variables(template["model"])]
+        except Exception as exc:  # noqa: BLE001
+            outcomes[path] = exc
+            continue
+        batch_count = -(-len(job["splits"]["x_train"]) // args.batch_size)
+        groups.setdefault((batch_count, job["epochs"]), []).append(job)
+
+    for jobs in groups.values():
+        template = model_template(args.lookback, jobs[0]["splits"]["x_train"].shape[2])
+        try:
+            if len(jobs) == 1:
+                reset_model_state(template)
+                assign_model_weights(template["model"], jobs[0]["weights"])
+                fit_stock_model(template["model"], jobs[0], args)
+                jobs[0]["weights"] = [variable.numpy() for variable in stacked_model_variables(template["model"])]
+            else:
+                fit_stacked_models(jobs, args)
+        except Exception as exc:  # noqa: BLE001
+            outcomes.update({job["path"]: exc for job in jobs})
+            continue
+        for job in jobs:
+            try:
+                assign_model_weights(template["model"], job["weights"])
+                outcomes[job["path"]] = finish_stock_job(template, job)
+            except Exception as exc:  # noqa: BLE001
+                outcomes[job["path"]] = exc
+    return outcomes
+
+
+def assign_model_weights(model, weights):
+    for variable, value in zip(stacked_model_variables(model), weights):
+        variable.assign(value)
+
+
+def stacked_model_variables(model):
+    heads = [model.get_layer("returns"), model.get_layer("prob_up")]
+    body = [layer for layer in model.layers if layer.weights and layer not in heads]
+    return [variable for layer in body + heads for variable in layer.weights]
+
+
+def stacked_lstm(inputs, kernel, recurrent_kernel, bias, return_sequences):
+    projected = tf.einsum("gbtf,gfu->tgbu", inputs, kernel) + bias[:, None, :]
+    state = tf.zeros_like(projected[0, :, :, : recurrent_kernel.shape[1]])
+
+    def step(carry, z):
+        hidden, cell = carry
+        z = z + tf.matmul(hidden, recurrent_kernel)
+        input_gate, forget_gate, candidate, output_gate = tf.split(z, 4, axis=-1)
+        cell = tf.sigmoid(forget_gate) * cell + tf.sigmoid(input_gate) * tf.tanh(candidate)
+        return tf.sigmoid(output_gate) * tf.tanh(cell), cell
+
+    hidden = tf.scan(step, projected, initializer=(state, state))[0]
+    if return_sequences:
+        return tf.transpose(hidden, [1, 2, 0, 3])
+    return hidden[-1]
+
+
+def stacked_forward(weights, windows, training):
+    (
+        lstm1_kernel,
+        lstm1_recurrent,
+        lstm1_bias,
+        lstm2_kernel,
+        lstm2_recurrent,
+        lstm2_bias,
+        dense_kernel,
+        dense_bias,
+        returns_kernel,
+        returns_bias,
+        prob_kernel,
+        prob_bias,
+    ) = weights
+    x = stacked_lstm(windows, lstm1_kernel, lstm1_recurrent, lstm1_bias, return_sequences=True)
+    if training:
+        x = tf.nn.dropout(x, 0.25)
+    x = stacked_lstm(x, lstm2_kernel, lstm2_recurrent, lstm2_bias, return_sequences=False)
+    x = tf.nn.relu(tf.matmul(x, dense_kernel) + dense_bias[:, None, :])
+    if training:
+        x = tf.nn.dropout(x, 0.15)
+    returns = tf.matmul(x, returns_kernel) + returns_bias[:, None, :]
+    prob_up = tf.sigmoid(tf.matmul(x, prob_kernel) + prob_bias[:, None, :])
+    return returns, prob_up
+
+
+def stacked_sample_losses(weights, windows, y_returns, y_up, training):
+    returns, prob_up = stacked_forward(weights, windows, training)
+    return (
+        LSTM_LOSS_WEIGHTS["returns"] * keras.losses.huber(y_returns, returns)
+        + LSTM_LOSS_WEIGHTS["prob_up"] * keras.losses.binary_crossentropy(y_up, prob_up)
+    )
+
+
+def pad_stacked(arrays, length, fill=0):
+    padded = np.full((len(arrays), length) + arrays[0].shape[1:], fill, dtype=arrays[0].dtype)
+    for idx, array in enumerate(arrays):
+        padded[idx, : len(array)] = array
+    return padded
+
+
+def stacked_split_arrays(jobs, split, row_sets, length):
+    return {
+        "ends": pad_stacked(row_sets, length, fill=row_sets[0][0]).astype(np.int32),
+        "mask": pad_stacked([np.ones(len(rows), dtype=np.float32) for rows in row_sets], length),
+        "returns": pad_stacked([job["splits"][f"y_{split}_returns"] for job in jobs], length),
+        "up": pad_stacked([job["splits"][f"y_{split}_up"] for job in jobs], length),
+    }
+
+
+def fit_stacked_models(jobs, args):
+    lookback = args.lookback
+    batch_size = args.batch_size
+    max_horizon = max(args.horizon_1d, args.horizon_5d, args.horizon_20d)
+    train_rows = []
+    val_rows = []
+    for job in jobs:
+        base_idx = sample_base_rows(job["closes"], lookback, max_horizon)
+        train_count = len(job["splits"]["x_train"])
+        train_rows.append(base_idx[:train_count])
+        val_rows.append(base_idx[train_count : train_count + len(job["splits"]["x_val"])])
+
+    table = tf.constant(
+        pad_stacked(
+            [((job["features"] - job["mean"][0]) / job["std"][0]).astype(np.float32) for job in jobs],
+            max(len(job["features"]) for job in jobs),
+        )
+    )
+    batch_count = -(-max(len(rows) for rows in train_rows) // batch_size)
+    val_count = -(-max(len(rows) for rows in val_rows) // batch_size)
+    train = stacked_split_arrays(jobs, "train", train_rows, batch_count * batch_size)
+    val = stacked_split_arrays(jobs, "val", val_rows, val_count * batch_size)
+    val_sizes = val["mask"].sum(axis=1)
+
+    variables = [tf.Variable(np.stack(weights)) for weights in zip(*[job["weights"] for job in jobs])]
+    optimizer = keras.optimizers.Adam(learning_rate=1e-3)
+    offsets = tf.range(-(lookback - 1), 1)
+
+    def gather_windows(ends):
+        return tf.gather(table, ends[:, :, None] + offsets, batch_dims=1)
+
+    @tf.function
+    def train_step(ends, mask, y_returns, y_up):
+        with tf.GradientTape() as tape:
+            losses = stacked_sample_losses(variables, gather_windows(ends), y_returns, y_up, training=True)
+            loss = tf.reduce_sum(
+                tf.reduce_sum(losses * mask, axis=1) / tf.maximum(tf.reduce_sum(mask, axis=1), 1.0)
+            )
+        optimizer.apply_gradients(zip(tape.gradient(loss, variables), variables))
+
+    @tf.function
+    def val_step(ends, mask, y_returns, y_up):
+        losses = stacked_sample_losses(variables, gather_windows(ends), y_returns, y_up, training=False)
+        return tf.reduce_sum(losses * mask, axis=1)
+
+    best_loss = np.full(len(jobs), np.inf)
+    wait = np.zeros(len(jobs), dtype=np.int64)
+    stopped = np.zeros(len(jobs), dtype=bool)
+    best_weights = [variable.numpy() for variable in variables]
+    epochs = jobs[0]["epochs"]
+    for epoch in range(epochs):
+        for step in range(batch_count):
+            batch = slice(step * batch_size, (step + 1) * batch_size)
+            train_step(train["ends"][:, batch], train["mask"][:, batch], train["returns"][:, batch], train["up"][:, batch])
+        val_loss = np.zeros(len(jobs))
+        for step in range(val_count):
+            batch = slice(step * batch_size, (step + 1) * batch_size)
+            val_loss += val_step(val["ends"][:, batch], val["mask"][:, batch], val["returns"][:, batch], val["up"][:, batch]).numpy()
+        val_loss /= val_sizes
+
+        active = ~stopped
+        wait[active] += 1
+        improved = active & ((val_loss < best_loss - 1e-3) | (epoch == 0))
+        best_loss[improved] = val_loss[improved]
+        wait[improved] = 0
+        for best, variable in zip(best_weights, variables):
+            best[improved] = variable.numpy()[improved]
+        stopped |= active & ~improved & (wait >= 3) & (epoch > 0)
+        if stopped.all():
+            break
+
+    for idx, job in enumerate(jobs):
+        job["weights"] = [best[idx] for best in best_weights]
+
+
+def validation_targets(splits, train_samples):
+    return {
+        "y_val_up": splits["y_val_up"],
+        "y_val_returns": splits["y_val_returns"],
+        "train_samples": train_samples,
+    }
+
+
+def build_prediction_item(
+    series,
+    features,
+    feature_names,
+    validation,
+    val_returns,
+    val_prob_raw,
+    latest_returns,
+    latest_prob_raw,
+    calibrator,
+):
+    stock_name = series["ISU_NM"]
     calibrated_val_probs, prob_up, validation_brier = calibrate_probabilities(
-        splits["y_val_up"],
+        validation["y_val_up"],
         val_prob_raw,
         latest_prob_raw,
+        calibrator,
     )
     validation_accuracy = float(
-        np.mean((calibrated_val_probs > 0.5) == (splits["y_val_up"][:, 0] > 0.5))
+        np.mean((calibrated_val_probs > 0.5) == (validation["y_val_up"][:, 0] > 0.5))
     )
 
     pred_return_1d = float(latest_returns[0][0])
     pred_return_5d = float(latest_returns[0][1])
     pred_return_20d = float(latest_returns[0][2])
     confidence = compute_confidence(
-        splits["y_val_up"],
-        splits["y_val_returns"],
+        validation["y_val_up"],
+        validation["y_val_returns"],
         val_returns[:, 0],
         calibrated_val_probs,
         prob_up,
@@ -1253,10 +2974,10 @@ def predict_for_stock(path, args, news_index=None, regime_cache=None, stock_sign
     latest_stock_news_negative = latest_feature_map.get("stock_news_negative_score", 0.0)
 
     result = {
-        "market": clean_cell(latest.get("MKT_NM", "")),
-        "code": clean_cell(latest.get("ISU_CD", "")),
+        "market": series["MKT_NM"],
+        "code": series["ISU_CD"],
         "name": stock_name,
-        "as_of": clean_cell(latest.get("BAS_DD", "")),
+        "as_of": str(series["BAS_DD"][-1]),
         "pred_return_1d": round(pred_return_1d, 4),
         "pred_return_5d": round(pred_return_5d, 4),
         "pred_return_20d": round(pred_return_20d, 4),
@@ -1281,12 +3002,428 @@ def predict_for_stock(path, args, news_index=None, regime_cache=None, stock_sign
         "stock_news_article_count": round(latest_stock_news_count, 6),
         "stock_news_positive_score": round(latest_stock_news_positive, 6),
         "stock_news_negative_score": round(latest_stock_news_negative, 6),
-        "train_samples": int(len(splits["x_train"])),
-        "validation_size": int(len(splits["x_val"])),
+        "train_samples": int(validation["train_samples"]),
+        "validation_size": int(len(validation["y_val_up"])),
+    }
+    return result
+
+
+def print_prediction(prediction):
+    print(
+        "  ok:"
+        f" {prediction['code']} pred1={prediction['pred_return_1d']:+.2f}%"
+        f" pred5={prediction['pred_return_5d']:+.2f}%"
+        f" pred20={prediction['pred_return_20d']:+.2f}%"
+        f" prob={prediction['prob_up']:.2%}"
+        f" conf={prediction['confidence']:.2%}"
+        f" acc={prediction['validation_accuracy_1d']:.2%}"
+    )
+
+
+def export_per_stock_predictions(source_files, loaded_series, load_errors, feature_batches, args):
+    predictions = []
+    skipped = []
+    stock_features = {}
+    outcomes = None
+    if args.workers > 1 or args.stack_size > 1:
+        try:
+            outcomes = train_stock_batches(feature_batches, loaded_series, args)
+        except Exception as exc:  # noqa: BLE001
+            print(f"  training failed: {exc}")
+            outcomes = {path: exc for path in source_files}
+    for index, path in enumerate(source_files, start=1):
+        print(f"[{index}/{len(source_files)}] {path.name}")
+        try:
+            if path in load_errors:
+                raise load_errors[path]
+            prediction = None
+            if outcomes is not None:
+                prediction = outcomes.get(path)
+                if isinstance(prediction, Exception):
+                    raise prediction
+            elif loaded_series.get(path) is not None:
+                if path not in stock_features:
+                    stock_features = next(feature_batches)
+                prediction = predict_for_stock(
+                    path,
+                    args,
+                    series=loaded_series[path],
+                    features=stock_batch_features(stock_features, path),
+                )
+        except Exception as exc:  # noqa: BLE001
+            skipped.append({"file": path.name, "reason": str(exc)})
+            print(f"  skipped: {exc}")
+            continue
+
+        if not prediction:
+            skipped.append({"file": path.name, "reason": "insufficient_data_or_below_market_cap"})
+            print("  skipped: insufficient_data_or_below_market_cap")
+            continue
+
+        predictions.append(prediction)
+        print_prediction(prediction)
+    release_model_templates()
+    return predictions, skipped
+
+
+def split_sample_rows(base_idx, y_returns, y_up):
+    splits = split_dataset(base_idx, y_returns, y_up)
+    if splits is None:
+        return None
+    splits["idx_train"] = splits.pop("x_train")
+    splits["idx_val"] = splits.pop("x_val")
+    return splits
+
+
+def prepare_pooled_symbol(series, features, args):
+    closes, features, feature_names = features
+    features = np.asarray(features, dtype=np.float32)
+    closes = np.asarray(closes, dtype=np.float32)
+    if len(features) < args.lookback:
+        return None
+    base_idx = sample_base_rows(closes, args.lookback, max(args.horizon_1d, args.horizon_5d, args.horizon_20d))
+    if not len(base_idx):
+        return None
+    y_returns, y_up = sample_targets(closes, base_idx, (args.horizon_1d, args.horizon_5d, args.horizon_20d))
+    splits = split_sample_rows(base_idx, y_returns, y_up)
+    if splits is None:
+        return None
+
+    windows = np.lib.stride_tricks.sliding_window_view(features, args.lookback, axis=0).transpose(0, 2, 1)
+    mean, std = normalization_stats(windows[splits["idx_train"] - (args.lookback - 1)])
+    return {
+        "mean": mean,
+        "std": std,
+        "series": series,
+        "features": features,
+        "feature_names": feature_names,
+        "normalized": ((features - mean[0]) / std[0]).astype(np.float32),
+        "splits": splits,
     }
 
+
+def pooled_window_dataset(table, end_rows, symbol_ids, y_returns, y_up, lookback, batch_size, seed=None):
+    offsets = tf.range(-(lookback - 1), 1, dtype=tf.int64)
+    dataset = tf.data.Dataset.from_tensor_slices((end_rows.astype(np.int64), symbol_ids.astype(np.int32), y_returns, y_up))
+    if seed is not None:
+        dataset = dataset.shuffle(len(end_rows), seed=seed, reshuffle_each_iteration=True)
+
+    def gather_windows(ends, ids, returns, up):
+        windows = tf.gather(table, ends[:, None] + offsets)
+        return {"price_features": windows, "symbol_id": ids}, {"returns": returns, "prob_up": up}
+
+    dataset = dataset.batch(batch_size).map(gather_windows, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def export_pooled_predictions(source_files, loaded_series, load_errors, feature_batches, args):
+    skipped = []
+    symbols = []
+    stock_features = {}
+    for path in source_files:
+        try:
+            if path in load_errors:
+                raise load_errors[path]
+            symbol = None
+            if loaded_series.get(path) is not None:
+                if path not in stock_features:
+                    stock_features = next(feature_batches)
+                symbol = prepare_pooled_symbol(loaded_series[path], stock_batch_features(stock_features, path), args)
+        except Exception as exc:  # noqa: BLE001
+            skipped.append({"file": path.name, "reason": str(exc)})
+            print(f"  skipped {path.name}: {exc}")
+            continue
+
+        if symbol is None:
+            skipped.append({"file": path.name, "reason": "insufficient_data_or_below_market_cap"})
+            continue
+        symbol["path"] = path
+        symbols.append(symbol)
+
+    if not symbols:
+        return [], skipped
+
+    offsets = np.cumsum([0] + [len(symbol["normalized"]) for symbol in symbols])
+    table = tf.constant(np.concatenate([symbol["normalized"] for symbol in symbols]))
+    datasets = {}
+    for split in ("train", "val"):
+        datasets[split] = pooled_window_dataset(
+            table,
+            np.concatenate([offsets[idx] + symbol["splits"][f"idx_{split}"] for idx, symbol in enumerate(symbols)]),
+            np.concatenate([np.full(len(symbol["splits"][f"idx_{split}"]), idx) for idx, symbol in enumerate(symbols)]),
+            np.concatenate([symbol["splits"][f"y_{split}_returns"] for symbol in symbols]),
+            np.concatenate([symbol["splits"][f"y_{split}_up"] for symbol in symbols]),
+            args.lookback,
+            args.pooled_batch_size,
+            seed=args.seed if split == "train" else None,
+        )
+    train_count = sum(len(symbol["splits"]["idx_train"]) for symbol in symbols)
+    print(f"Training pooled model on {len(symbols)} symbols ({train_count} windows)")
+
     tf.keras.backend.clear_session()
-    return result
+    model = create_pooled_model(args.lookback, table.shape[1], len(symbols))
+    model.fit(
+        datasets["train"],
+        validation_data=datasets["val"],
+        epochs=args.epochs,
+        verbose=0,
+        callbacks=[
+            keras.callbacks.EarlyStopping(
+                monitor="val_loss",
+                patience=3,
+                min_delta=1e-3,
+                restore_best_weights=True,
+            )
+        ],
+    )
+
+    val_predictions = model.predict(datasets["val"], verbose=0)
+    latest_predictions = model.predict(
+        {
+            "price_features": np.stack([symbol["normalized"][-args.lookback :] for symbol in symbols]),
+            "symbol_id": np.arange(len(symbols), dtype=np.int32),
+        },
+        batch_size=args.pooled_batch_size,
+        verbose=0,
+    )
+    val_bounds = np.cumsum([0] + [len(symbol["splits"]["idx_val"]) for symbol in symbols])
+
+    predictions = []
+    artifacts = {}
+    for idx, symbol in enumerate(symbols):
+        path = symbol["path"]
+        print(f"[{idx + 1}/{len(symbols)}] {path.name}")
+        val_slice = slice(val_bounds[idx], val_bounds[idx + 1])
+        artifact = {
+            "symbol_id": idx,
+            "mean": symbol["mean"],
+            "std": symbol["std"],
+            "val_returns": val_predictions["returns"][val_slice],
+            "val_prob_raw": val_predictions["prob_up"][val_slice],
+            "validation": validation_targets(symbol["splits"], len(symbol["splits"]["idx_train"])),
+        }
+        artifact["calibrator"] = fit_probability_calibrator(symbol["splits"]["y_val_up"], artifact["val_prob_raw"])
+        artifacts[f"{path.parent.name}_{path.stem}"] = artifact
+        try:
+            prediction = build_prediction_item(
+                symbol["series"],
+                symbol["features"],
+                symbol["feature_names"],
+                artifact["validation"],
+                artifact["val_returns"],
+                artifact["val_prob_raw"],
+                latest_predictions["returns"][idx : idx + 1],
+                latest_predictions["prob_up"][idx : idx + 1],
+                artifact["calibrator"],
+            )
+        except Exception as exc:  # noqa: BLE001
+            skipped.append({"file": path.name, "reason": str(exc)})
+            print(f"  skipped: {exc}")
+            continue
+        predictions.append(prediction)
+        print_prediction(prediction)
+
+    if args.cache_dir is not None:
+        save_pooled_artifact(model, artifacts, pooled_model_dir(args.cache_dir, symbols[0]["feature_names"], args))
+    tf.keras.backend.clear_session()
+    return predictions, skipped
+
+
+def pooled_model_dir(cache_dir, feature_names, args):
+    return Path(cache_dir) / "models" / model_signature(feature_names, args) / "pooled"
+
+
+def save_pooled_artifact(model, artifacts, model_dir):
+    weights_path = model_dir / "pooled.weights.h5"
+    artifact_path = model_dir / "pooled_artifact.pkl"
+    tmp_path = artifact_path.with_name(f"{artifact_path.name}.tmp")
+    artifact_path.unlink(missing_ok=True)
+    if not save_model_weights(model, weights_path):
+        return
+    try:
+        with tmp_path.open("wb") as handle:
+            pickle.dump(
+                {"version": MODEL_ARTIFACT_VERSION, "symbol_count": len(artifacts), "symbols": artifacts},
+                handle,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, artifact_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_pooled_artifact(model_dir):
+    try:
+        with (model_dir / "pooled_artifact.pkl").open("rb") as handle:
+            artifact = pickle.load(handle)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if artifact.get("version") != MODEL_ARTIFACT_VERSION:
+        return None
+    return artifact
+
+
+def latest_stock_windows(source_files, loaded_series, load_errors, feature_batches, args):
+    windows = []
+    skipped = []
+    stock_features = {}
+    for path in source_files:
+        try:
+            if path in load_errors:
+                raise load_errors[path]
+            window = None
+            if loaded_series.get(path) is not None:
+                if path not in stock_features:
+                    stock_features = next(feature_batches)
+                closes, features, feature_names = stock_batch_features(stock_features, path)
+                if len(features) >= args.lookback:
+                    window = {
+                        "path": path,
+                        "series": loaded_series[path],
+                        "features": features,
+                        "feature_names": feature_names,
+                        "x_latest": np.asarray(features[-args.lookback :], dtype=np.float32),
+                    }
+        except Exception as exc:  # noqa: BLE001
+            skipped.append({"file": path.name, "reason": str(exc)})
+            print(f"  skipped {path.name}: {exc}")
+            continue
+
+        if window is None:
+            skipped.append({"file": path.name, "reason": "insufficient_data_or_below_market_cap"})
+            continue
+        windows.append(window)
+    return windows, skipped
+
+
+def build_predicted_items(windows, artifacts, latest_returns, latest_prob_raw, skipped):
+    predictions = []
+    for idx, (window, artifact) in enumerate(zip(windows, artifacts)):
+        path = window["path"]
+        print(f"[{idx + 1}/{len(windows)}] {path.name}")
+        try:
+            prediction = build_prediction_item(
+                window["series"],
+                window["features"],
+                window["feature_names"],
+                artifact["validation"],
+                artifact["val_returns"],
+                artifact["val_prob_raw"],
+                latest_returns[idx : idx + 1],
+                latest_prob_raw[idx : idx + 1],
+                artifact["calibrator"],
+            )
+        except Exception as exc:  # noqa: BLE001
+            skipped.append({"file": path.name, "reason": str(exc)})
+            print(f"  skipped: {exc}")
+            continue
+        predictions.append(prediction)
+        print_prediction(prediction)
+    return predictions
+
+
+def predict_per_stock_from_artifacts(windows, skipped, args):
+    ready = []
+    artifacts = []
+    weights = []
+    for window in windows:
+        weights_path = model_weights_path(window["path"], args.cache_dir, window["feature_names"], args)
+        artifact = load_model_artifact(model_artifact_path(weights_path))
+        template = model_template(args.lookback, window["x_latest"].shape[1])
+        if artifact is None or not load_model_weights(template["model"], weights_path):
+            skipped.append({"file": window["path"].name, "reason": "missing_model_artifact"})
+            continue
+        ready.append(window)
+        artifacts.append(artifact)
+        weights.append([variable.numpy() for variable in stacked_model_variables(template["model"])])
+
+    latest_returns = []
+    latest_prob_raw = []
+    for offset in range(0, len(ready), PREDICT_STACK_SIZE):
+        chunk = slice(offset, offset + PREDICT_STACK_SIZE)
+        stacked_weights = [np.stack(values) for values in zip(*weights[chunk])]
+        windows_batch = np.stack(
+            [
+                normalized_input(window["x_latest"][None, :], artifact["mean"][0], artifact["std"][0])
+                for window, artifact in zip(ready[chunk], artifacts[chunk])
+            ]
+        )
+        returns, prob_up = stacked_forward(stacked_weights, windows_batch, training=False)
+        latest_returns.append(returns.numpy()[:, 0])
+        latest_prob_raw.append(prob_up.numpy()[:, 0])
+    release_model_templates()
+    if windows and not ready:
+        model_dir = Path(args.cache_dir) / "models" / model_signature(windows[0]["feature_names"], args)
+        raise SystemExit(f"No per-stock model artifacts found under {model_dir}. Run the train command first.")
+    if not ready:
+        return []
+    return build_predicted_items(
+        ready,
+        artifacts,
+        np.concatenate(latest_returns),
+        np.concatenate(latest_prob_raw),
+        skipped,
+    )
+
+
+def predict_pooled_from_artifacts(windows, skipped, args):
+    if not windows:
+        return []
+    model_dir = pooled_model_dir(args.cache_dir, windows[0]["feature_names"], args)
+    stored = load_pooled_artifact(model_dir)
+    if stored is None:
+        raise SystemExit(f"No pooled model artifact found under {model_dir}. Run the train command first.")
+
+    tf.keras.backend.clear_session()
+    model = create_pooled_model(args.lookback, windows[0]["x_latest"].shape[1], stored["symbol_count"])
+    model.optimizer.build(model.trainable_variables)
+    if not load_model_weights(model, model_dir / "pooled.weights.h5"):
+        raise SystemExit(f"Pooled model weights under {model_dir} could not be loaded.")
+
+    ready = []
+    artifacts = []
+    for window in windows:
+        artifact = stored["symbols"].get(f"{window['path'].parent.name}_{window['path'].stem}")
+        if artifact is None:
+            skipped.append({"file": window["path"].name, "reason": "missing_model_artifact"})
+            continue
+        ready.append(window)
+        artifacts.append(artifact)
+    if not ready:
+        tf.keras.backend.clear_session()
+        raise SystemExit(f"No pooled model artifacts under {model_dir} match these symbols. Run the train command first.")
+
+    latest_predictions = model.predict(
+        {
+            "price_features": np.stack(
+                [
+                    normalized_input(window["x_latest"], artifact["mean"][0], artifact["std"][0])
+                    for window, artifact in zip(ready, artifacts)
+                ]
+            ),
+            "symbol_id": np.array([artifact["symbol_id"] for artifact in artifacts], dtype=np.int32),
+        },
+        batch_size=args.pooled_batch_size,
+        verbose=0,
+    )
+    tf.keras.backend.clear_session()
+    return build_predicted_items(
+        ready,
+        artifacts,
+        latest_predictions["returns"],
+        latest_predictions["prob_up"],
+        skipped,
+    )
+
+
+def export_saved_model_predictions(source_files, loaded_series, load_errors, feature_batches, args):
+    windows, skipped = latest_stock_windows(source_files, loaded_series, load_errors, feature_batches, args)
+    print(f"Predicting {len(windows)} symbols from saved {args.model_mode} models")
+    if args.model_mode == "pooled":
+        predictions = predict_pooled_from_artifacts(windows, skipped, args)
+    else:
+        predictions = predict_per_stock_from_artifacts(windows, skipped, args)
+    return predictions, skipped
 
 
 def make_prediction_key(market, code):
@@ -1309,38 +3446,137 @@ def prediction_priority(item):
     return 0.65 * prob + 0.25 * confidence + 0.10 * scaled_return
 
 
-def build_actual_close_index(source_files):
-    index = {}
+MARKET_PANEL_VERSION = 1
+
+
+def market_panel_sources(source_files):
+    sources = []
+    for path in source_files:
+        stat = path.stat()
+        sources.append([str(path), stat.st_size, stat.st_mtime_ns])
+    return sources
+
+
+def open_market_panel(panel_dir, meta):
+    return {
+        "fields": list(meta["fields"]),
+        "dates": np.load(panel_dir / "dates.npy", allow_pickle=False),
+        "symbols": [entry["key"] for entry in meta["symbols"]],
+        "symbol_meta": meta["symbols"],
+        "values": np.load(panel_dir / "values.npy", mmap_mode="r", allow_pickle=False),
+    }
+
+
+def read_market_panel(panel_dir, sources):
+    try:
+        meta = json.loads((panel_dir / "panel.json").read_text(encoding="utf-8"))
+        if meta.get("version") != MARKET_PANEL_VERSION or meta.get("sources") != sources:
+            return None
+        return open_market_panel(panel_dir, meta)
+    except (OSError, ValueError, KeyError, json.JSONDecodeError):
+        return None
+
+
+def index_market_panel(panel):
+    panel["date_to_index"] = {str(value): idx for idx, value in enumerate(panel["dates"])}
+    panel["symbol_to_index"] = {key: idx for idx, key in enumerate(panel["symbols"])}
+    panel["field_to_index"] = {field: idx for idx, field in enumerate(panel["fields"])}
+    return panel
+
+
+def build_market_panel(source_files, cache_dir=None):
+    sources = market_panel_sources(source_files)
+    panel_dir = Path(cache_dir) / "panel" if cache_dir is not None else None
+    if panel_dir is not None:
+        panel = read_market_panel(panel_dir, sources)
+        if panel is not None:
+            return index_market_panel(panel)
+
+    symbols = {}
     for path in source_files:
-        rows = read_krx_rows(path)
-        if len(rows) < 2:
+        series = load_krx_series(path, cache_dir)
+        if len(series["BAS_DD"]) < 2:
             continue
-        latest = rows[-1]
-        market = clean_cell(latest.get("MKT_NM", "")).upper()
-        code = clean_cell(latest.get("ISU_CD", ""))
+        market = series["MKT_NM"].upper()
+        code = series["ISU_CD"]
         if not code:
             continue
-        trading_dates = []
-        closes = []
-        for row in rows:
-            trading_date = normalize_trading_date(row.get("BAS_DD", ""))
-            close_price = parse_float(row.get("TDD_CLSPRC", ""))
-            if not trading_date or close_price <= 0:
-                continue
-            trading_dates.append(trading_date)
-            closes.append(close_price)
-        if len(trading_dates) < 2:
+        trading_dates = np.array([normalize_trading_date(value) for value in series["BAS_DD"]], dtype=np.str_)
+        valid = (trading_dates != "") & (series["TDD_CLSPRC"] > 0)
+        if np.count_nonzero(valid) < 2:
             continue
-        date_to_index = {value: idx for idx, value in enumerate(trading_dates)}
-        index[make_prediction_key(market, code)] = {
+        symbols[make_prediction_key(market, code)] = {
             "market": market,
             "code": code,
-            "name": clean_cell(latest.get("ISU_NM", "")),
-            "trading_dates": trading_dates,
-            "closes": closes,
-            "date_to_index": date_to_index,
+            "name": series["ISU_NM"],
+            "trading_dates": trading_dates[valid],
+            "columns": [series[field][valid] for field in KRX_NUMERIC_FIELDS],
         }
-    return index
+
+    if symbols:
+        dates = np.unique(np.concatenate([entry["trading_dates"] for entry in symbols.values()]))
+    else:
+        dates = np.array([], dtype="<U8")
+    shape = (len(KRX_NUMERIC_FIELDS), len(symbols), len(dates))
+    if panel_dir is not None:
+        panel_dir.mkdir(parents=True, exist_ok=True)
+        values_tmp = panel_dir / "values.tmp.npy"
+        values = np.lib.format.open_memmap(values_tmp, mode="w+", dtype=np.float32, shape=shape)
+    else:
+        values = np.empty(shape, dtype=np.float32)
+    values[...] = np.nan
+
+    symbol_meta = []
+    for symbol_idx, (key, entry) in enumerate(symbols.items()):
+        positions = np.searchsorted(dates, entry["trading_dates"])
+        for field_idx, column in enumerate(entry["columns"]):
+            values[field_idx, symbol_idx, positions] = column
+        symbol_meta.append({"key": key, "market": entry["market"], "code": entry["code"], "name": entry["name"]})
+
+    meta = {
+        "version": MARKET_PANEL_VERSION,
+        "fields": list(KRX_NUMERIC_FIELDS),
+        "symbols": symbol_meta,
+        "sources": sources,
+    }
+    if panel_dir is None:
+        return index_market_panel(
+            {
+                "fields": meta["fields"],
+                "dates": dates,
+                "symbols": [entry["key"] for entry in symbol_meta],
+                "symbol_meta": symbol_meta,
+                "values": values,
+            }
+        )
+
+    values.flush()
+    del values
+    os.replace(values_tmp, panel_dir / "values.npy")
+    with (panel_dir / "dates.tmp.npy").open("wb") as handle:
+        np.save(handle, dates)
+    os.replace(panel_dir / "dates.tmp.npy", panel_dir / "dates.npy")
+    (panel_dir / "panel.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    return index_market_panel(open_market_panel(panel_dir, meta))
+
+
+def panel_field(panel, field):
+    return panel["values"][panel["field_to_index"][field]]
+
+
+def next_panel_close(panel, key, trading_date):
+    symbol_idx = panel["symbol_to_index"].get(key)
+    date_idx = panel["date_to_index"].get(trading_date)
+    if symbol_idx is None or date_idx is None:
+        return None
+    closes = panel_field(panel, "TDD_CLSPRC")[symbol_idx]
+    if np.isnan(closes[date_idx]):
+        return None
+    following = np.flatnonzero(~np.isnan(closes[date_idx + 1 :]))
+    if not len(following):
+        return None
+    next_idx = date_idx + 1 + int(following[0])
+    return str(panel["dates"][next_idx]), float(closes[date_idx]), float(closes[next_idx])
 
 
 def archive_prediction_snapshot(payload, history_dir):
@@ -1421,7 +3657,7 @@ def summarize_evaluation_items(items, top_k=20):
     }
 
 
-def evaluate_snapshot_file(snapshot_path, evaluation_dir, actual_index, top_k=20):
+def evaluate_snapshot_file(snapshot_path, evaluation_dir, market_panel, top_k=20):
     try:
         payload = json.loads(snapshot_path.read_text(encoding="utf-8"))
     except (OSError, json.JSONDecodeError):
@@ -1442,19 +3678,14 @@ def evaluate_snapshot_file(snapshot_path, evaluation_dir, actual_index, top_k=20
         market = clean_cell(item.get("market", "")).upper()
         code = clean_cell(item.get("code", ""))
         key = make_prediction_key(market, code)
-        actual = actual_index.get(key)
-        if actual is None:
-            missing_actual += 1
-            continue
-
         item_as_of = clean_cell(item.get("as_of", "")) or prediction_as_of
-        idx = actual["date_to_index"].get(item_as_of)
-        if idx is None or idx + 1 >= len(actual["trading_dates"]):
+        actual = next_panel_close(market_panel, key, item_as_of)
+        if actual is None:
             missing_actual += 1
             continue
 
-        actual_as_of = actual["trading_dates"][idx + 1]
-        actual_return = pct_change(actual["closes"][idx + 1], actual["closes"][idx])
+        actual_as_of, base_close, next_close = actual
+        actual_return = pct_change(next_close, base_close)
         actual_up = actual_return > 0
         prob_up = float(item.get("prob_up", 0.0))
         pred_return = float(item.get("pred_return_1d", 0.0))
@@ -1977,11 +4208,20 @@ def build_walkforward_backtest(evaluation_dir, output_path):
     return backtest_payload
 
 
-def build_data_usage_audit(data_root, news_index, nxt_index, latest_payload, history_dir, evaluation_dir, output_path):
+def build_data_usage_audit(
+    data_root,
+    news_index,
+    nxt_index,
+    latest_payload,
+    history_dir,
+    evaluation_dir,
+    output_path,
+    cache_dir=None,
+):
     output_path.parent.mkdir(parents=True, exist_ok=True)
     source_files = collect_files(data_root, ["KOSPI", "KOSDAQ"])
-    actual_index = build_actual_close_index(source_files)
-    latest_krx_as_of = max((value["trading_dates"][-1] for value in actual_index.values() if value["trading_dates"]), default="")
+    market_panel = build_market_panel(source_files, cache_dir)
+    latest_krx_as_of = str(market_panel["dates"][-1]) if len(market_panel["dates"]) and market_panel["symbols"] else ""
 
     items = latest_payload.get("items", [])
     item_count = len(items)
@@ -2008,7 +4248,7 @@ def build_data_usage_audit(data_root, news_index, nxt_index, latest_payload, his
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "krx_data": {
             "source_file_count": len(source_files),
-            "indexed_symbol_count": len(actual_index),
+            "indexed_symbol_count": len(market_panel["symbols"]),
             "latest_as_of": latest_krx_as_of,
             "markets": {
                 "KOSPI": len(collect_files(data_root, ["KOSPI"])),
@@ -2025,7 +4265,7 @@ def build_data_usage_audit(data_root, news_index, nxt_index, latest_payload, his
             "used_by_model_stock_signals": stock_news_feature_count > 0,
         },
         "nxt_data": {
-            "snapshot_count": len(nxt_index),
+            "snapshot_count": len(nxt_index.get("days", {})),
             "used_by_model": nxt_feature_count > 0,
         },
         "prediction_payload": {
@@ -2066,7 +4306,7 @@ def collect_files(data_root, markets):
     return paths
 
 
-def collect_prediction_files(data_root, markets):
+def collect_prediction_files(data_root, markets, cache_dir=None):
     latest_by_key = {}
     latest_as_of = ""
 
@@ -2075,12 +4315,11 @@ def collect_prediction_files(data_root, markets):
         if directory is None or not directory.exists():
             continue
         for path in sorted(directory.glob("*.csv")):
-            rows = read_krx_rows(path)
-            if not rows:
+            latest = probe_krx_latest(path, cache_dir)
+            if latest is None:
                 continue
-            latest = rows[-1]
-            code = normalize_security_code(latest.get("ISU_CD", ""))
-            as_of = normalize_trading_date(latest.get("BAS_DD", ""))
+            code = normalize_security_code(latest["ISU_CD"])
+            as_of = normalize_trading_date(latest["BAS_DD"])
             if not code or not as_of:
                 continue
             key = (market.strip().upper(), code)
@@ -2107,7 +4346,7 @@ def collect_prediction_files(data_root, markets):
     return active_paths
 
 
-def filter_files_by_codes(paths, codes):
+def filter_files_by_codes(paths, codes, cache_dir=None):
     normalized_codes = {normalize_security_code(code) for code in codes}
     normalized_codes.discard("")
     if not normalized_codes:
@@ -2115,15 +4354,28 @@ def filter_files_by_codes(paths, codes):
 
     filtered = []
     for path in paths:
-        rows = read_krx_rows(path)
-        if not rows:
+        latest = probe_krx_latest(path, cache_dir)
+        if latest is None:
             continue
-        code = normalize_security_code(rows[-1].get("ISU_CD", ""))
+        code = normalize_security_code(latest["ISU_CD"])
         if code in normalized_codes:
             filtered.append(path)
     return filtered
 
 
+def print_feature_costs(feature_costs, feature_names):
+    model_costs = {name: feature_costs[name] for name in feature_names if name in feature_costs}
+    intermediate_costs = {name: seconds for name, seconds in feature_costs.items() if name not in model_costs}
+    for label, costs in (("Feature costs", model_costs), ("Intermediate costs", intermediate_costs)):
+        if not costs:
+            continue
+        ranked_costs = sorted(costs.items(), key=lambda item: item[1], reverse=True)
+        print(
+            f"{label} ({len(costs)} entries): "
+            + ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in ranked_costs)
+        )
+
+
 def main():
     args = parse_args()
     ensure_dependencies()
@@ -2142,21 +4394,30 @@ def main():
         args.backtest_output = args.output.parent / "lstm_walkforward_backtest.json"
     if args.data_audit_output is None:
         args.data_audit_output = args.output.parent / "lstm_data_usage_audit.json"
-
-    source_files = collect_prediction_files(args.data_root, args.markets)
-    source_files = filter_files_by_codes(source_files, args.codes)
+    if args.cache_dir is None:
+        args.cache_dir = args.output.parent / "cache"
+    if args.load_workers <= 0:
+        args.load_workers = min(8, os.cpu_count() or 1)
+    if args.workers <= 0:
+        args.workers = auto_training_workers()
+    args.stack_size = max(1, args.stack_size)
+
+    source_files = collect_prediction_files(args.data_root, args.markets, args.cache_dir)
+    source_files = filter_files_by_codes(source_files, args.codes, args.cache_dir)
     if args.limit > 0:
         source_files = source_files[: args.limit]
 
     if not source_files:
         raise SystemExit("No KRX CSV files were found for the requested markets.")
 
-    news_index = load_news_articles_index(args.news_file, min_tier=args.news_quality_min_tier)
-    nxt_index = load_nxt_snapshot_index(args.nxt_dir)
+    news_index = load_news_articles_index(
+        args.news_file,
+        min_tier=args.news_quality_min_tier,
+        cache_dir=args.cache_dir,
+    )
+    nxt_index = load_nxt_snapshot_index(args.nxt_dir, cache_dir=args.cache_dir)
     regime_cache = {}
     stock_signal_cache = {}
-    predictions = []
-    skipped = []
 
     print(f"Found {len(source_files)} files. Exporting predictions to {args.output}")
     precise_count = len(news_index.get("precise", []))
@@ -2169,39 +4430,62 @@ def main():
             f"(precise={precise_count}, date_only_buckets={date_only_count}, "
             f"stock_precise_keys={stock_precise_count}, stock_date_only_keys={stock_bucket_count})"
         )
-    if nxt_index:
-        print(f"Loaded NXT delayed snapshots from {args.nxt_dir} (dates={len(nxt_index)})")
-    for index, path in enumerate(source_files, start=1):
-        print(f"[{index}/{len(source_files)}] {path.name}")
-        try:
-            prediction = predict_for_stock(
-                path,
-                args,
-                news_index=news_index,
-                regime_cache=regime_cache,
-                stock_signal_cache=stock_signal_cache,
-                nxt_index=nxt_index,
-            )
-        except Exception as exc:  # noqa: BLE001
-            skipped.append({"file": path.name, "reason": str(exc)})
-            print(f"  skipped: {exc}")
-            continue
-
-        if not prediction:
-            skipped.append({"file": path.name, "reason": "insufficient_data_or_below_market_cap"})
-            print("  skipped: insufficient_data_or_below_market_cap")
-            continue
-
-        predictions.append(prediction)
-        print(
-            "  ok:"
-            f" {prediction['code']} pred1={prediction['pred_return_1d']:+.2f}%"
-            f" pred5={prediction['pred_return_5d']:+.2f}%"
-            f" pred20={prediction['pred_return_20d']:+.2f}%"
-            f" prob={prediction['prob_up']:.2%}"
-            f" conf={prediction['confidence']:.2%}"
-            f" acc={prediction['validation_accuracy_1d']:.2%}"
+    if nxt_index["days"]:
+        print(f"Loaded NXT delayed snapshots from {args.nxt_dir} (dates={len(nxt_index['days'])})")
+    loaded_series, load_errors = load_krx_universe(
+        source_files,
+        cache_dir=args.cache_dir,
+        min_market_cap=args.min_market_cap,
+        workers=args.load_workers,
+    )
+    eligible_count = sum(1 for series in loaded_series.values() if series is not None)
+    print(
+        f"Loaded KRX files with {min(args.load_workers, len(source_files))} workers "
+        f"(eligible={eligible_count}, errors={len(load_errors)})"
+    )
+    eligible_paths = [path for path in source_files if loaded_series.get(path) is not None]
+    feature_names = resolve_feature_names(DEFAULT_MODEL_VERSION, args.exclude_feature_groups)
+    feature_groups = feature_groups_used(feature_names)
+    feature_costs = {}
+    calendar = {normalize_trading_date(value) for path in eligible_paths for value in loaded_series[path]["BAS_DD"]}
+    regime_table = None
+    stock_news_table = None
+    if "market_news" in feature_groups:
+        regime_table = build_market_regime_table(calendar, news_index, regime_cache)
+    if "stock_news" in feature_groups:
+        stock_news_table = build_stock_news_table(
+            calendar,
+            news_index,
+            [normalize_stock_signal_key(loaded_series[path]["ISU_NM"]) for path in eligible_paths],
+        )
+    feature_batches = iter_feature_batches(
+        eligible_paths,
+        loaded_series,
+        news_index=news_index,
+        regime_cache=regime_cache,
+        stock_signal_cache=stock_signal_cache,
+        nxt_index=nxt_index,
+        cache_dir=args.cache_dir,
+        regime_table=regime_table,
+        stock_news_table=stock_news_table,
+        feature_names=feature_names,
+        feature_costs=feature_costs,
+    )
+    if args.command == "predict":
+        predictions, skipped = export_saved_model_predictions(
+            source_files, loaded_series, load_errors, feature_batches, args
         )
+    elif args.model_mode == "pooled":
+        predictions, skipped = export_pooled_predictions(
+            source_files, loaded_series, load_errors, feature_batches, args
+        )
+    else:
+        predictions, skipped = export_per_stock_predictions(
+            source_files, loaded_series, load_errors, feature_batches, args
+        )
+
+    if feature_costs:
+        print_feature_costs(feature_costs, feature_names)
 
     predictions.sort(key=lambda item: (item.get("market", ""), item.get("code", "")))
     prediction_as_of = max((item.get("as_of", "") for item in predictions), default="")
@@ -2209,6 +4493,7 @@ def main():
     payload = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "model_version": DEFAULT_MODEL_VERSION,
+        "model_mode": args.model_mode,
         "prediction_as_of": prediction_as_of,
         "lookback_days": args.lookback,
         "horizon_1d": args.horizon_1d,
@@ -2225,10 +4510,10 @@ def main():
     archived_snapshot = archive_prediction_snapshot(payload, args.history_dir)
 
     evaluation_source_files = collect_files(args.data_root, ["KOSPI", "KOSDAQ"])
-    actual_index = build_actual_close_index(evaluation_source_files)
+    market_panel = build_market_panel(evaluation_source_files, args.cache_dir)
     evaluated_snapshots = []
     for snapshot_path in sorted(args.history_dir.glob("lstm_predictions_*.json")):
-        evaluated = evaluate_snapshot_file(snapshot_path, args.evaluation_dir, actual_index, top_k=20)
+        evaluated = evaluate_snapshot_file(snapshot_path, args.evaluation_dir, market_panel, top_k=20)
         if evaluated is None:
             continue
         if int(evaluated["payload"].get("evaluated_count", 0)) <= 0:
@@ -2252,6 +4537,7 @@ def main():
         args.history_dir,
         args.evaluation_dir,
         args.data_audit_output,
+        cache_dir=args.cache_dir,
     )
     print(f"Saved {len(predictions)} predictions to {args.output}")
     if archived_snapshot is not None:
@@ -0,0 +1,65 @@
+import argparse
+from time import perf_counter
+
+import batch_krx_lstm_export as export
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Measure per-stock model setup and inference overhead with and without the reusable model template."
+    )
+    parser.add_argument("--stocks", type=int, default=30)
+    parser.add_argument("--lookback", type=int, default=60)
+    parser.add_argument("--feature-count", type=int, default=len(export.FEATURE_NAMES))
+    parser.add_argument("--val-size", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def rebuild_overhead(x_val, x_latest, lookback, feature_count):
+    export.tf.keras.backend.clear_session()
+    model = export.create_model(lookback, feature_count)
+    model(x_val, training=False)
+    model(x_latest, training=False)
+    export.tf.keras.backend.clear_session()
+
+
+def template_overhead(x_val, x_latest, lookback, feature_count):
+    template = export.model_template(lookback, feature_count)
+    export.reset_model_state(template)
+    template["predict"](x_val)
+    template["predict"](x_latest)
+
+
+def time_per_stock(step, inputs, lookback, feature_count):
+    start = perf_counter()
+    for x_val, x_latest in inputs:
+        step(x_val, x_latest, lookback, feature_count)
+    return (perf_counter() - start) / len(inputs)
+
+
+def main():
+    args = parse_args()
+    export.ensure_dependencies()
+    np = export.np
+    rng = np.random.default_rng(args.seed)
+    inputs = [
+        (
+            rng.normal(size=(args.val_size + index % 8, args.lookback, args.feature_count)).astype(np.float32),
+            rng.normal(size=(1, args.lookback, args.feature_count)).astype(np.float32),
+        )
+        for index in range(args.stocks)
+    ]
+
+    template_overhead(inputs[0][0], inputs[0][1], args.lookback, args.feature_count)
+    rebuild_seconds = time_per_stock(rebuild_overhead, inputs, args.lookback, args.feature_count)
+    template_seconds = time_per_stock(template_overhead, inputs, args.lookback, args.feature_count)
+
+    print(f"Stocks: {args.stocks} (lookback={args.lookback}, features={args.feature_count})")
+    print(f"Rebuild per stock:  {rebuild_seconds * 1000:.1f}ms")
+    print(f"Template per stock: {template_seconds * 1000:.1f}ms")
+    print(f"Speedup: {rebuild_seconds / max(template_seconds, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
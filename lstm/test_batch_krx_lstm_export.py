@@ -0,0 +1,658 @@
+import argparse
+import csv
+import io
+import json
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import batch_krx_lstm_export as export
+
+KRX_HEADER = ["BAS_DD", "MKT_NM", "ISU_CD", "ISU_NM", *export.KRX_NUMERIC_FIELDS]
+
+
+@pytest.fixture(autouse=True)
+def numpy_loaded():
+    export.ensure_numpy()
+
+
+def krx_row(day, close, market_cap=2_000_000_000_000):
+    return [
+        (date(2022, 1, 3) + timedelta(days=day)).strftime("%Y%m%d"),
+        "KOSPI",
+        "005930",
+        "삼성전자",
+        f"{close:,.0f}",
+        f"{close * 1.02:,.0f}",
+        f"{close * 0.98:,.0f}",
+        f"{close * 0.99:,.0f}",
+        f"{close * 1000:,.0f}",
+        "1,000",
+        f"{market_cap:,.0f}",
+    ]
+
+
+def write_krx_csv(path, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    writer.writerow(KRX_HEADER)
+    writer.writerows(rows)
+    path.write_bytes(b"\xef\xbb\xbf" + buffer.getvalue().encode("utf-8"))
+    return path
+
+
+def reference_krx_rows(path):
+    text = path.read_bytes().replace(b"\x00", b"").decode("utf-8-sig", errors="ignore")
+    rows = []
+    for row in csv.DictReader(io.StringIO(text)):
+        cleaned = {key: export.clean_cell(value) for key, value in row.items()}
+        if not export.clean_cell(cleaned.get("BAS_DD", "")):
+            continue
+        if export.parse_float(cleaned.get("TDD_CLSPRC", "")) <= 0:
+            continue
+        rows.append(cleaned)
+    rows.sort(key=lambda item: item.get("BAS_DD", ""))
+    return rows
+
+
+def assert_series_matches_rows(series, rows):
+    assert list(series["BAS_DD"]) == [row["BAS_DD"] for row in rows]
+    for field in export.KRX_NUMERIC_FIELDS:
+        np.testing.assert_array_equal(series[field], [export.parse_float(row[field]) for row in rows])
+    for field in export.KRX_IDENTITY_FIELDS:
+        assert series[field] == rows[-1][field]
+
+
+def messy_krx_rows():
+    rows = [krx_row(day, 70_000 + day * 10) for day in range(40)]
+    rows[5], rows[17] = rows[17], rows[5]
+    rows[8][4] = "0"
+    rows[12][0] = ""
+    rows[20][9] = "-"
+    rows.append([])
+    return rows
+
+
+def test_read_krx_series_matches_dict_reader(tmp_path):
+    path = write_krx_csv(tmp_path / "005930_삼성전자.csv", messy_krx_rows())
+    assert_series_matches_rows(export.read_krx_series(path), reference_krx_rows(path))
+
+
+def test_load_krx_series_cache_round_trip(tmp_path):
+    path = write_krx_csv(tmp_path / "005930_삼성전자.csv", messy_krx_rows())
+    cache_dir = tmp_path / "cache"
+    cold = export.load_krx_series(path, cache_dir)
+    assert export.krx_cache_path(path, cache_dir).exists()
+    warm = export.load_krx_series(path, cache_dir)
+    assert_series_matches_rows(cold, reference_krx_rows(path))
+    assert_series_matches_rows(warm, reference_krx_rows(path))
+
+
+@pytest.mark.parametrize("row_count", [30, 600])
+def test_probe_krx_latest_matches_full_load(tmp_path, row_count):
+    rows = [krx_row(day, 50_000 + day) for day in range(row_count)]
+    rows[-1][10] = "3,500,000,000,000"
+    path = write_krx_csv(tmp_path / "005930_삼성전자.csv", rows)
+    latest = reference_krx_rows(path)[-1]
+    probe = export.probe_krx_latest(path)
+    assert probe["BAS_DD"] == latest["BAS_DD"]
+    assert probe["MKTCAP"] == export.parse_float(latest["MKTCAP"])
+    for field in export.KRX_IDENTITY_FIELDS:
+        assert probe[field] == latest[field]
+
+
+NEWS_HEADER = "keyword,title,description,publishedAt,pubDate,qualityScore,qualityTier,link\n"
+
+
+def news_line(index):
+    return f"삼성전자,수주 상승 {index},금리 인하 {index},2024-03-{index % 28 + 1:02d}T09:00:00+09:00,,80,high,x\n"
+
+
+def news_summary(index):
+    return sorted((article["pub_date"], article["market_scores"]) for article in index["precise"])
+
+
+def test_news_index_defers_partial_rows_until_complete(tmp_path):
+    path = tmp_path / "news_merged.csv"
+    cache_dir = tmp_path / "cache"
+    complete = NEWS_HEADER + "".join(news_line(index) for index in range(10))
+    partial = news_line(10)
+    path.write_text(complete + partial[:20], encoding="utf-8")
+
+    first = export.load_news_articles_index(path, min_tier="low", cache_dir=cache_dir)
+    assert len(first["precise"]) == 10
+
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(partial[20:] + news_line(11))
+    resumed = export.load_news_articles_index(path, min_tier="low", cache_dir=cache_dir)
+    cold = export.load_news_articles_index(path, min_tier="low")
+    assert len(resumed["precise"]) == 12
+    assert news_summary(resumed) == news_summary(cold)
+
+
+def test_news_index_rebuilds_from_corrupt_cache(tmp_path):
+    path = tmp_path / "news_merged.csv"
+    cache_dir = tmp_path / "cache"
+    path.write_text(NEWS_HEADER + "".join(news_line(index) for index in range(5)), encoding="utf-8")
+    cache_dir.mkdir()
+    (cache_dir / "news_index.pkl").write_bytes(b"\x80\x05garbage")
+    index = export.load_news_articles_index(path, min_tier="low", cache_dir=cache_dir)
+    assert len(index["precise"]) == 5
+
+
+def reference_nxt_index(nxt_dir):
+    index = {}
+    for path in sorted(nxt_dir.glob("nxt_snapshot_*.json")):
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        trading_date = export.normalize_trading_date(payload.get("trading_date", ""))
+        if not trading_date:
+            continue
+        day_index = {}
+        for item in payload.get("items", []):
+            market = export.clean_cell(item.get("market", "")).upper()
+            code = export.normalize_security_code(item.get("code", "")) or export.normalize_security_code(
+                item.get("short_code", "")
+            )
+            if not code:
+                continue
+            quote = {field: export.parse_float(item.get(field, 0.0)) for field in export.NXT_QUOTE_FIELDS}
+            day_index[export.make_prediction_key(market, code)] = quote
+            day_index.setdefault(code, quote)
+        if day_index:
+            index[trading_date] = day_index
+    return index
+
+
+def reference_nxt_features(trading_dates, stock_market, stock_code, market_caps, avg_turnover_ratio_20, nxt_index):
+    count = len(trading_dates)
+    change_rate = np.zeros(count, dtype=np.float32)
+    intraday_return = np.zeros(count, dtype=np.float32)
+    close_strength = np.full(count, 50.0, dtype=np.float32)
+    trade_value_ratio = np.zeros(count, dtype=np.float32)
+    available = np.zeros(count, dtype=np.float32)
+    for idx, trading_date in enumerate(trading_dates):
+        day_quotes = nxt_index.get(trading_date, {})
+        quote = day_quotes.get(export.make_prediction_key(stock_market, stock_code)) or day_quotes.get(stock_code)
+        if not quote:
+            continue
+        change_rate[idx] = quote["change_rate"]
+        intraday_return[idx] = export.pct_change(quote["current_price"], quote["open_price"])
+        if quote["high_price"] > quote["low_price"]:
+            close_strength[idx] = (
+                (quote["current_price"] - quote["low_price"]) / (quote["high_price"] - quote["low_price"])
+            ) * 100.0
+        if market_caps[idx] > 0:
+            trade_value_ratio[idx] = (quote["trade_value"] / market_caps[idx]) * 100.0
+        available[idx] = 1.0
+    trade_value_impulse = np.divide(
+        trade_value_ratio,
+        np.maximum(avg_turnover_ratio_20, 1e-3),
+        out=np.zeros_like(trade_value_ratio, dtype=np.float32),
+        where=avg_turnover_ratio_20 > 0,
+    )
+    return change_rate, intraday_return, close_strength, trade_value_ratio, trade_value_impulse, available
+
+
+def write_nxt_snapshot(nxt_dir, trading_date, items):
+    path = nxt_dir / f"nxt_snapshot_{trading_date}.json"
+    path.write_text(json.dumps({"trading_date": trading_date, "items": items}), encoding="utf-8")
+    return path
+
+
+def nxt_item(market, code, price, short_code=""):
+    return {
+        "market": market,
+        "code": code,
+        "short_code": short_code,
+        "current_price": f"{price:,.1f}",
+        "change_rate": round(price % 7 - 3.5, 2),
+        "open_price": price * 0.991,
+        "high_price": price * 1.013,
+        "low_price": price * 0.987,
+        "trade_value": price * 12345.6,
+        "volume": 1000,
+    }
+
+
+def assert_nxt_features_match(nxt_dir, nxt_index, trading_dates):
+    market_caps = np.linspace(1e12, 2e12, len(trading_dates))
+    avg_turnover = np.linspace(0.0, 0.5, len(trading_dates)).astype(np.float32)
+    reference = reference_nxt_index(nxt_dir)
+    for market, code in (("KOSPI", "005930"), ("KOSDAQ", "005930"), ("KOSDAQ", "247540"), ("KOSPI", "000000")):
+        expected = reference_nxt_features(trading_dates, market, code, market_caps, avg_turnover, reference)
+        actual = export.build_nxt_features(trading_dates, market, code, market_caps, avg_turnover, nxt_index)
+        for expected_column, actual_column in zip(expected, actual):
+            np.testing.assert_array_equal(actual_column, expected_column)
+
+
+def test_nxt_index_matches_per_date_quotes(tmp_path):
+    nxt_dir = tmp_path / "snapshots"
+    nxt_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+    trading_dates = [f"202403{day:02d}" for day in range(1, 11)]
+    for day in range(1, 8, 2):
+        write_nxt_snapshot(
+            nxt_dir,
+            f"202403{day:02d}",
+            [
+                nxt_item("KOSPI", "005930", 71234.5 + day),
+                nxt_item("KOSDAQ", "A247540", 250111.1 + day),
+                nxt_item("KONEX", "", 999.0 + day, short_code="005930"),
+            ],
+        )
+    (nxt_dir / "nxt_snapshot_20240309.json").write_text("{broken", encoding="utf-8")
+
+    assert_nxt_features_match(nxt_dir, export.load_nxt_snapshot_index(nxt_dir, cache_dir), trading_dates)
+
+    write_nxt_snapshot(nxt_dir, "20240309", [nxt_item("KOSPI", "005930", 73001.7)])
+    write_nxt_snapshot(nxt_dir, "20240303", [nxt_item("KOSDAQ", "247540", 251000.3)])
+    (nxt_dir / "nxt_snapshot_20240305.json").unlink()
+    assert_nxt_features_match(nxt_dir, export.load_nxt_snapshot_index(nxt_dir, cache_dir), trading_dates)
+
+
+def reference_rolling(values, window, reducer):
+    out = np.zeros_like(values, dtype=np.float32)
+    for idx in range(len(values)):
+        start = max(0, idx - window + 1)
+        out[idx] = reducer(values[start : idx + 1])
+    return out
+
+
+def rolling_fixtures():
+    rng = np.random.default_rng(7)
+    prices = 70_000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, size=300)))
+    returns = rng.normal(0.0, 2.5, size=300).astype(np.float32)
+    flat = np.full(40, 1234.5)
+    return [prices, returns, flat, prices[:3], prices[:0]]
+
+
+@pytest.mark.parametrize("window", [1, 5, 20, 60, 500])
+@pytest.mark.parametrize(
+    "kernel,reducer,tolerance",
+    [
+        (export.rolling_mean, np.mean, 1e-6),
+        (export.rolling_std, np.std, 1e-5),
+        (export.rolling_max, np.max, 0.0),
+        (export.rolling_min, np.min, 0.0),
+    ],
+)
+def test_rolling_kernels_match_window_loops(window, kernel, reducer, tolerance):
+    for values in rolling_fixtures():
+        expected = reference_rolling(values, window, reducer)
+        actual = kernel(values, window)
+        assert actual.dtype == np.float32
+        assert actual.shape == expected.shape
+        scale = max(float(np.max(np.abs(values), initial=0.0)), 1.0)
+        np.testing.assert_allclose(actual, expected, rtol=tolerance, atol=tolerance * scale)
+
+
+@pytest.mark.parametrize("kernel", [export.rolling_mean, export.rolling_std, export.rolling_max, export.rolling_min])
+def test_rolling_kernels_apply_per_row(kernel):
+    stacked = np.stack(rolling_fixtures()[:2])
+    expected = np.stack([kernel(values, 20) for values in stacked])
+    np.testing.assert_array_equal(kernel(stacked, 20), expected)
+
+
+def test_feature_batches_isolate_failing_stocks(tmp_path, monkeypatch):
+    paths = []
+    loaded_series = {}
+    for code in ("005930", "000660", "035420"):
+        rows = [krx_row(day, 40_000 + day * 7) for day in range(80)]
+        for row in rows:
+            row[2] = code
+        path = write_krx_csv(tmp_path / f"{code}.csv", rows)
+        paths.append(path)
+        loaded_series[path] = export.read_krx_series(path)
+    expected = {}
+    for batch in export.iter_feature_batches(paths, loaded_series):
+        expected.update(batch)
+
+    build_feature_tensor = export.build_feature_tensor
+
+    def failing_build(series_list, **options):
+        if any(series["ISU_CD"] == "000660" for series in series_list):
+            raise ValueError("broken 000660")
+        return build_feature_tensor(series_list, **options)
+
+    monkeypatch.setattr(export, "FEATURE_BATCH_SIZE", 2)
+    monkeypatch.setattr(export, "build_feature_tensor", failing_build)
+    batches = list(export.iter_feature_batches(paths, loaded_series))
+    assert [list(batch) for batch in batches] == [paths[:2], paths[2:]]
+    with pytest.raises(ValueError, match="broken 000660"):
+        export.stock_batch_features(batches[0], paths[1])
+    for path in (paths[0], paths[2]):
+        features = export.stock_batch_features(batches[paths.index(path) // 2], path)
+        np.testing.assert_array_equal(features[1], expected[path][1])
+
+    outcomes = {}
+    assert list(export.split_feature_failures(batches[0], outcomes)) == [paths[0]]
+    assert isinstance(outcomes[paths[1]], ValueError)
+
+
+def timed_news_line(keyword, day, hour, index):
+    return f"{keyword},수주 상승 {index},금리 인하 {index},2024-03-{day:02d}T{hour:02d}:00:00+09:00,,80,high,x\n"
+
+
+def ordered_news(index):
+    stocks = {
+        key: [(article["published_at"], article["stock_scores"]) for article in articles]
+        for key, articles in index["stock_precise"].items()
+    }
+    return [(article["published_at"], article["stock_key"]) for article in index["precise"]], stocks
+
+
+def test_news_index_merges_appended_articles_in_time_order(tmp_path):
+    path = tmp_path / "news_merged.csv"
+    cache_dir = tmp_path / "cache"
+    keywords = ("삼성전자", "SK하이닉스", "NAVER")
+    lines = [timed_news_line(keywords[index % 3], 10 + index % 5, 9, index) for index in range(12)]
+    path.write_text(NEWS_HEADER + "".join(lines), encoding="utf-8")
+    export.load_news_articles_index(path, min_tier="low", cache_dir=cache_dir)
+
+    appended = [timed_news_line(keywords[index % 2], 8 + index % 9, 9, index) for index in range(20, 32)]
+    appended.append(timed_news_line("카카오", 12, 9, 40))
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write("".join(appended))
+    resumed = export.load_news_articles_index(path, min_tier="low", cache_dir=cache_dir)
+    cold = export.load_news_articles_index(path, min_tier="low")
+
+    assert ordered_news(resumed) == ordered_news(cold)
+    np.testing.assert_array_equal(resumed["precise_times"], cold["precise_times"])
+    assert resumed["stock_precise_times"].keys() == cold["stock_precise_times"].keys()
+    for key, times in cold["stock_precise_times"].items():
+        np.testing.assert_array_equal(resumed["stock_precise_times"][key], times)
+
+
+def reference_keyword_counts(groups, text):
+    return [sum(1 for keyword in group["keywords"] if keyword.lower() in text) for group in groups]
+
+
+def keyword_texts(groups, seed):
+    rng = np.random.default_rng(seed)
+    vocabulary = [keyword for group in groups for keyword in group["keywords"]]
+    vocabulary += ["삼성", "금리", "상", "하", "war", "re", "a", " ", "..."]
+    texts = ["", "관련 없음", " ".join(vocabulary)]
+    for _ in range(200):
+        words = rng.choice(vocabulary, size=int(rng.integers(1, 12)))
+        joiner = "" if rng.random() < 0.3 else " "
+        texts.append(export.normalize_regime_text(joiner.join(words)))
+    return texts
+
+
+@pytest.mark.parametrize(
+    "groups",
+    [
+        export.MARKET_REGIME_KEYWORDS,
+        export.STOCK_NEWS_KEYWORDS,
+        [
+            {"keywords": ["he", "she", "his", "hers"]},
+            {"keywords": ["she", "Sh", "e", "e"]},
+            {"keywords": []},
+            {"keywords": ["금리 인하", "인하", "금리"]},
+        ],
+    ],
+)
+def test_keyword_matcher_matches_substring_counts(groups):
+    matcher = export.compile_keyword_matcher(groups)
+    for text in keyword_texts(groups, len(groups)) + ["ushers", "shis", "금리 인하 금리"]:
+        assert export.match_keyword_groups(matcher, text) == reference_keyword_counts(groups, text)
+
+
+class BrokenAfterFirstSubmit:
+    def __init__(self, **options):
+        self.submitted = 0
+
+    def submit(self, function, chunk, *args):
+        self.submitted += 1
+        if self.submitted > 1:
+            raise BrokenProcessPool("pool is broken")
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_train_stock_batches_falls_back_in_process_when_pool_breaks(monkeypatch):
+    monkeypatch.setattr(export, "ProcessPoolExecutor", BrokenAfterFirstSubmit)
+    monkeypatch.setattr(
+        export, "predict_for_stock_group", lambda chunk, args, series_list, features_list: {path: path for path in chunk}
+    )
+    args = argparse.Namespace(workers=2, stack_size=1, seed=0)
+    batches = [
+        {"a": (np.zeros(3), None, []), "b": (np.zeros(5), None, []), "c": ValueError("no features")},
+        {"d": (np.zeros(4), None, [])},
+    ]
+    outcomes = export.train_stock_batches(iter(batches), dict.fromkeys("abcd"), args)
+    assert isinstance(outcomes["a"], BrokenProcessPool)
+    assert isinstance(outcomes["c"], ValueError)
+    assert (outcomes["b"], outcomes["d"]) == ("b", "d")
+
+
+def training_digest(features, closes, signature="signature"):
+    x_data, y_returns, y_up = export.build_dataset(features, closes, 20, 1, 5, 20)
+    splits = export.split_dataset(x_data, y_returns, y_up)
+    return export.training_data_digest(features, closes, splits, 20, 20, signature)
+
+
+def test_training_data_digest_ignores_inference_window():
+    rng = np.random.default_rng(3)
+    closes = (50_000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, size=160)))).astype(np.float32)
+    features = rng.normal(size=(160, 6)).astype(np.float32)
+    digest = training_digest(features, closes)
+
+    refreshed = features.copy()
+    refreshed[-20:, 3] += 1.0
+    assert training_digest(refreshed, closes) == digest
+
+    retrained = features.copy()
+    retrained[30, 3] += 1.0
+    assert training_digest(retrained, closes) != digest
+    shifted = closes.copy()
+    shifted[50] *= 1.05
+    assert training_digest(features, shifted) != digest
+    assert training_digest(features, closes, "other") != digest
+
+
+@pytest.fixture
+def model_templates(monkeypatch):
+    export.ensure_dependencies()
+    monkeypatch.setattr(export, "MODEL_TEMPLATES", {})
+    yield export.MODEL_TEMPLATES
+    export.release_model_templates()
+
+
+def model_args(**overrides):
+    options = {
+        "lookback": 10,
+        "horizon_1d": 1,
+        "horizon_5d": 5,
+        "horizon_20d": 20,
+        "epochs": 3,
+        "batch_size": 16,
+        "warm_start_epochs": 0,
+        "cache_dir": None,
+        "seed": 0,
+    }
+    options.update(overrides)
+    return argparse.Namespace(**options)
+
+
+def stock_inputs(tmp_path, code, row_count, seed):
+    rng = np.random.default_rng(seed)
+    closes = 30_000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, size=row_count)))
+    rows = [krx_row(day, close) for day, close in enumerate(closes)]
+    for row in rows:
+        row[2] = code
+    path = write_krx_csv(tmp_path / f"{code}.csv", rows)
+    series = export.read_krx_series(path)
+    batch = next(export.iter_feature_batches([path], {path: series}))
+    return path, series, batch[path]
+
+
+def test_singleton_stock_groups_do_not_share_optimizer_state(tmp_path, monkeypatch, model_templates):
+    args = model_args()
+    stocks = [stock_inputs(tmp_path, "005930", 140, 1), stock_inputs(tmp_path, "000660", 230, 2)]
+    template = export.model_template(args.lookback, len(stocks[0][2][2]))
+    for layer in template["model"].layers:
+        if isinstance(layer, export.layers.Dropout):
+            layer.rate = 0.0
+
+    build_stock_model = export.build_stock_model
+    initial_weights = {}
+
+    def seeded_build(job, args):
+        template, reuse = build_stock_model(job, args)
+        model = template["model"]
+        weights = initial_weights.setdefault(
+            job["path"], [variable.numpy() for variable in export.stacked_model_variables(model)]
+        )
+        export.assign_model_weights(model, weights)
+        return template, reuse
+
+    monkeypatch.setattr(export, "build_stock_model", seeded_build)
+    outcomes = []
+    for ordered in (stocks, stocks[::-1]):
+        paths, series_list, features_list = zip(*ordered)
+        outcomes.append(export.predict_for_stock_group(list(paths), args, list(series_list), list(features_list)))
+
+    for path, _, _ in stocks:
+        first, second = outcomes[0][path], outcomes[1][path]
+        assert isinstance(first, dict)
+        for key in ("pred_return_1d", "pred_return_5d", "pred_return_20d", "prob_up", "confidence"):
+            assert first[key] == second[key]
+
+
+def test_stacked_forward_matches_single_models(model_templates):
+    lookback, feature_count, group_size = 12, 6, 3
+    template = export.model_template(lookback, feature_count)
+    model = template["model"]
+    weights = []
+    for _ in range(group_size):
+        export.reset_model_state(template)
+        weights.append([variable.numpy() for variable in export.stacked_model_variables(model)])
+    stacked = [export.tf.Variable(np.stack(values)) for values in zip(*weights)]
+
+    rng = np.random.default_rng(5)
+    windows = rng.normal(size=(group_size, 7, lookback, feature_count)).astype(np.float32)
+    y_returns = rng.normal(size=(group_size, 7, 3)).astype(np.float32)
+    y_up = (rng.random((group_size, 7, 1)) > 0.5).astype(np.float32)
+
+    returns, prob_up = export.stacked_forward(stacked, windows, training=False)
+    with export.tf.GradientTape() as tape:
+        losses = export.stacked_sample_losses(stacked, windows, y_returns, y_up, training=False)
+        loss = export.tf.reduce_sum(export.tf.reduce_mean(losses, axis=1))
+    gradients = tape.gradient(loss, stacked)
+
+    for idx in range(group_size):
+        export.assign_model_weights(model, weights[idx])
+        variables = export.stacked_model_variables(model)
+        with export.tf.GradientTape() as tape:
+            outputs = model(windows[idx], training=False)
+            single_loss = export.LSTM_LOSS_WEIGHTS["returns"] * export.keras.losses.Huber()(
+                y_returns[idx], outputs["returns"]
+            ) + export.LSTM_LOSS_WEIGHTS["prob_up"] * export.keras.losses.BinaryCrossentropy()(
+                y_up[idx], outputs["prob_up"]
+            )
+        np.testing.assert_allclose(returns[idx], outputs["returns"], rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(prob_up[idx], outputs["prob_up"], rtol=1e-5, atol=1e-6)
+        single_gradients = tape.gradient(single_loss, [variable.value for variable in variables])
+        for stacked_gradient, single_gradient in zip(gradients, single_gradients):
+            np.testing.assert_allclose(stacked_gradient[idx], single_gradient, rtol=1e-4, atol=1e-6)
+
+
+def saved_model_windows(stocks, args):
+    paths = [path for path, _, _ in stocks]
+    loaded_series = {path: series for path, series, _ in stocks}
+    feature_batches = export.iter_feature_batches(paths, loaded_series)
+    return export.latest_stock_windows(paths, loaded_series, {}, feature_batches, args)
+
+
+def test_predict_reuses_trained_per_stock_models(tmp_path, model_templates):
+    args = model_args(cache_dir=tmp_path / "cache")
+    stocks = [stock_inputs(tmp_path, "005930", 140, 1), stock_inputs(tmp_path, "000660", 160, 2)]
+    paths, series_list, features_list = zip(*stocks)
+    trained = export.predict_for_stock_group(list(paths), args, list(series_list), list(features_list))
+
+    windows, skipped = saved_model_windows(stocks, args)
+    predicted = export.predict_per_stock_from_artifacts(windows, skipped, args)
+    assert skipped == []
+    assert [item["code"] for item in predicted] == [trained[path]["code"] for path in paths]
+    for item, path in zip(predicted, paths):
+        for key in ("pred_return_1d", "pred_return_5d", "pred_return_20d", "prob_up"):
+            assert item[key] == pytest.approx(trained[path][key], abs=1e-4)
+
+
+def test_predict_refuses_to_run_without_matching_models(tmp_path, model_templates):
+    args = model_args(cache_dir=tmp_path / "cache")
+    stocks = [stock_inputs(tmp_path, "005930", 140, 1)]
+    windows, skipped = saved_model_windows(stocks, args)
+    with pytest.raises(SystemExit, match="Run the train command first"):
+        export.predict_per_stock_from_artifacts(windows, skipped, args)
+
+    paths, series_list, features_list = zip(*stocks)
+    export.predict_for_stock_group(list(paths), args, list(series_list), list(features_list))
+    args = model_args(cache_dir=tmp_path / "cache", lookback=12)
+    windows, skipped = saved_model_windows(stocks, args)
+    with pytest.raises(SystemExit, match="Run the train command first"):
+        export.predict_per_stock_from_artifacts(windows, skipped, args)
+    assert [entry["reason"] for entry in skipped] == ["missing_model_artifact"]
+
+
+def test_failed_weight_save_leaves_no_model_artifact(tmp_path, monkeypatch, model_templates):
+    args = model_args(cache_dir=tmp_path / "cache")
+    path, series, features = stock_inputs(tmp_path, "005930", 140, 1)
+    export.predict_for_stock_group([path], args, [series], [features])
+    weights_path = export.model_weights_path(path, args.cache_dir, features[2], args)
+    artifact_path = export.model_artifact_path(weights_path)
+    assert weights_path.exists() and artifact_path.exists()
+
+    def full_disk(model, filepath, *options, **keywords):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(export.keras.Model, "save_weights", full_disk)
+    assert export.save_model_weights(model_templates[next(iter(model_templates))]["model"], weights_path) is False
+    closes, values, names = features
+    closes = closes.copy()
+    closes[40] *= 1.05
+    outcome = export.predict_for_stock_group([path], args, [series], [(closes, values, names)])[path]
+    assert isinstance(outcome, dict)
+    assert not artifact_path.exists()
+    assert not list(weights_path.parent.glob("*.tmp.weights.h5"))
+
+
+def test_probe_krx_latest_prefers_cached_series_over_tail(tmp_path):
+    rows = [krx_row(day, 50_000 + day) for day in range(600)]
+    rows[300] = krx_row(900, 61_000, market_cap=4_000_000_000_000)
+    path = write_krx_csv(tmp_path / "005930_삼성전자.csv", rows)
+    cache_dir = tmp_path / "cache"
+    latest = reference_krx_rows(path)[-1]
+    assert export.probe_krx_latest(path, cache_dir)["BAS_DD"] == rows[-1][0]
+
+    export.load_krx_series(path, cache_dir)
+    probe = export.probe_krx_latest(path, cache_dir)
+    assert probe["BAS_DD"] == latest["BAS_DD"]
+    assert probe["MKTCAP"] == export.parse_float(latest["MKTCAP"])
+
+
+def test_pooled_symbol_splits_keep_row_indices_apart_from_windows(tmp_path):
+    args = model_args()
+    path, series, features = stock_inputs(tmp_path, "005930", 140, 1)
+    splits = export.prepare_pooled_symbol(series, features, args)["splits"]
+    x_data, y_returns, y_up = export.build_dataset(features[1], features[0], 10, 1, 5, 20)
+    windows = export.split_dataset(x_data, y_returns, y_up)
+    assert "x_train" not in splits and "x_val" not in splits
+    for split in ("train", "val"):
+        rows = splits[f"idx_{split}"]
+        assert rows.dtype.kind == "i"
+        np.testing.assert_array_equal(
+            np.stack([features[1][row - 9 : row + 1] for row in rows]), windows[f"x_{split}"]
+        )
+        np.testing.assert_array_equal(splits[f"y_{split}_returns"], windows[f"y_{split}_returns"])